@@ -0,0 +1,87 @@
+"""Micro-benchmark and equivalence check of column name cleansing.
+
+Compares the pattern based, memoized cleanse_names against the previous
+implementation, which rebuilt each name one character at a time and
+checked the growing prefix with isidentifier.  Before timing, both are
+run on random names and replacements and must agree on every one.
+
+Run from the repository root::
+
+    python benchmarks/bench_cleanse_names.py
+
+"""
+from os import path
+import random
+import sys
+import timeit
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..', 'psychroom'))
+
+import io_  # noqa: E402
+from io_ import cleanse_names  # noqa: E402
+
+
+ALPHABET = u'abcXYZ_019 -./[]()%#\t°µé'
+REPLACEMENTS = ['_', '', 'x', 'x1', '-', '1', u'é']
+HEADER = (
+    'comp_ref_in_T,comp_ref_in_pa,comp_ref_out_T,comp_ref_out_pa,'
+    'cond air in T,cond air out T,evap ref out T (C),evap ref dp [kPa],'
+    'idrm_air_RH,odrm_air_RH,1st stage P,2nd stage P,flow rate %,'
+    'test date,tester,power [W],voltage (V),current (A)'
+).split(',')
+
+
+def legacy_cleanse_names(names, repl='_'):
+    """The character by character implementation replaced by patterns."""
+
+    if isinstance(names, str):
+        return io_._legacy_cleanse_name(names, repl)
+
+    return [io_._legacy_cleanse_name(name, repl) for name in names]
+
+
+def check_equivalence(count=20000, seed=0):
+    """Compare both implementations on random names and replacements."""
+
+    rnd = random.Random(seed)
+    for _ in range(count):
+        name = u''.join(rnd.choice(ALPHABET)
+                        for _ in range(rnd.randint(0, 16)))
+        for repl in REPLACEMENTS:
+            expected = legacy_cleanse_names(name, repl)
+            result = cleanse_names(name, repl=repl)
+            if result != expected:
+                msg = 'cleanse_names({0!r}, repl={1!r}) = {2!r}, not {3!r}'
+                raise AssertionError(msg.format(name, repl, result, expected))
+
+    return count * len(REPLACEMENTS)
+
+
+def bench(func, names, number=2000, clear=False):
+    """Return cleansed names per second for func."""
+
+    def run():
+        if clear:
+            io_._NAME_CACHE.clear()
+        func(names)
+
+    best = min(timeit.Timer(run).repeat(repeat=5, number=number))
+
+    return number * len(names) / best
+
+
+def main():
+    print('equivalent on {0:,} random names'.format(check_equivalence()))
+
+    legacy = bench(legacy_cleanse_names, HEADER)
+    cold = bench(cleanse_names, HEADER, clear=True)
+    warm = bench(cleanse_names, HEADER)
+    print('character scan: {0:12,.0f} names/s'.format(legacy))
+    print('patterns:       {0:12,.0f} names/s'.format(cold))
+    print('memoized:       {0:12,.0f} names/s'.format(warm))
+    print('speed-up:       {0:12.1f}x / {1:.1f}x'
+          .format(cold / legacy, warm / legacy))
+
+
+if __name__ == '__main__':
+    main()
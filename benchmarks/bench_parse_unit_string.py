@@ -0,0 +1,73 @@
+"""Micro-benchmark of unit string parsing.
+
+Compares the suffix-trie parse_unit_string against the previous
+implementation, which scanned every library key and symbol with
+str.endswith.
+
+Run from the repository root::
+
+    python benchmarks/bench_parse_unit_string.py
+
+"""
+from os import path
+import sys
+import timeit
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..', 'psychroom'))
+
+from unit import load_libraries, parse_unit_string  # noqa: E402
+from util import DEG_SYMBOL  # noqa: E402
+
+
+UNIT_STRINGS = [
+    'degC', 'degF', 'K', 'kPa', 'Pa', 'MPa', 'bar', 'psi', '-', 'm', 'mm',
+    'kg', 'g', 's', 'min', 'hr', 'A', 'mA', 'V', 'kilopascal',
+]
+
+
+def legacy_parse_unit_string(raw):
+    """The endswith-scan implementation replaced by the suffix trie."""
+
+    p_lib, u_lib = load_libraries()
+
+    raw = raw.replace('deg', DEG_SYMBOL, 1)
+    u_str = [k for k in u_lib if raw.endswith(str(k))] or \
+        [i.symbol for k, i in u_lib.items() if raw.endswith(str(i.symbol))]
+    if not u_str:
+        raise Exception('Unrecognized unit string {}'.format(raw))
+
+    u_str = u_str.pop()
+    raw = raw[:raw.rfind(u_str)]
+
+    if not raw:
+        p_str = 'none'
+    else:
+        p_str = [k for k in p_lib if raw.endswith(str(k))] or \
+            [i.symbol for k, i in p_lib.items() if raw.endswith(str(i.symbol))]
+    if not p_str:
+        raise Exception('Unrecognized prefix string {}'.format(raw))
+
+    p_str = sorted(p_str)[-1]
+
+    return p_str, u_str
+
+
+def bench(func, number=2000):
+    """Return parsed unit strings per second for func."""
+
+    timer = timeit.Timer(lambda: [func(raw) for raw in UNIT_STRINGS])
+    best = min(timer.repeat(repeat=5, number=number))
+
+    return number * len(UNIT_STRINGS) / best
+
+
+def main():
+    legacy = bench(legacy_parse_unit_string)
+    trie = bench(parse_unit_string)
+    print('endswith scan: {0:12,.0f} strings/s'.format(legacy))
+    print('suffix trie:   {0:12,.0f} strings/s'.format(trie))
+    print('speed-up:      {0:12.1f}x'.format(trie / legacy))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Averaging of experimental data over selected windows."""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+Window = namedtuple('Window', ['start', 'stop'])
+Last = namedtuple('Last', ['duration'])
+
+WindowStatistics = namedtuple('WindowStatistics',
+                              ['windows', 'mean', 'std', 'count'])
+
+
+def window_statistics(data, windows):
+    """Compute the mean, standard deviation and count over data windows.
+
+    The statistics of every window and column are computed at once from
+    cumulative sums over the data, so windows are never sliced out of
+    the data frame, and overlapping windows cost no more than disjoint
+    ones.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        measurement data with a sorted index, usually returned by read_
+    windows : window spec or [window spec]
+        a spec is either
+
+        - Window(start, stop) or any (start, stop) pair of index labels,
+          both included and None for an open end, e.g. a time range or
+          a SteadyStateInterval,
+        - Last(duration) for the trailing duration, a timedelta or
+          string such as '10min' for data with a DatetimeIndex and a
+          number of samples otherwise,
+        - a function of the data returning window specs, e.g. a steady
+          state detector.
+
+    Returns
+    -------
+    statistics : WindowStatistics
+        windows data frame with the start and stop label and number of
+        samples of each window, and mean, std and count data frames of
+        the numeric columns with one row per window, missing values are
+        skipped
+
+    Examples
+    --------
+    >>> data = pd.DataFrame({'comp_ref_in_T': [1., 2., 3., np.nan, 5.]})
+    >>> stats = window_statistics(data, [Window(1, 3), Last(2)])
+    >>> stats.mean['comp_ref_in_T'].tolist()
+    [2.5, 5.0]
+    >>> stats.count['comp_ref_in_T'].tolist()
+    [2, 1]
+
+    """
+
+    bounds = _resolve(data, windows)
+    keys = [key for key in data.keys()
+            if np.issubdtype(data[key].dtype, np.number)]
+    values = np.array(data[keys].values, dtype=float)
+
+    # Values are summed relative to their column means to limit the
+    # cancellation in the variance.
+    finite = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        offset = np.where(finite, values, 0.).sum(axis=0) / finite.sum(axis=0)
+    offset[np.isnan(offset)] = 0.
+    y = np.where(finite, values - offset, 0.)
+
+    sums = np.zeros((3, len(values) + 1, len(keys)))
+    np.cumsum(finite, axis=0, out=sums[0, 1:])
+    np.cumsum(y, axis=0, out=sums[1, 1:])
+    np.cumsum(y * y, axis=0, out=sums[2, 1:])
+
+    begin, end = bounds[:, 0], bounds[:, 1]
+    count, sy, syy = sums[:, end] - sums[:, begin]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sy / count
+        var = (syy - sy * mean) / (count - 1)
+    std = np.sqrt(np.maximum(var, 0.))
+    std[count < 2] = np.nan
+    mean += offset
+
+    index = data.index
+    result = WindowStatistics(
+        pd.DataFrame({
+            'start': [index[pos] if pos < stop else None
+                      for pos, stop in bounds],
+            'stop': [index[stop - 1] if pos < stop else None
+                     for pos, stop in bounds],
+            'samples': end - begin,
+        }, columns=['start', 'stop', 'samples']),
+        pd.DataFrame(mean, columns=keys),
+        pd.DataFrame(std, columns=keys),
+        pd.DataFrame(count.astype(int), columns=keys),
+    )
+
+    units = getattr(data, 'units', {})
+    for frame in (result.mean, result.std):
+        for key in keys:
+            if key in units:
+                frame[key].unit = units[key]
+        frame.units = {key: units[key] for key in keys if key in units}
+
+    return result
+
+
+def _resolve(data, windows):
+    """Return the [begin, end) sample positions of window specs."""
+
+    if callable(windows):
+        windows = windows(data)
+    if not isinstance(windows, list):
+        windows = [windows]
+
+    index = data.index
+    bounds = []
+    for spec in windows:
+        if callable(spec):
+            bounds.extend(_resolve(data, spec))
+        elif isinstance(spec, Last):
+            end = len(index)
+            if isinstance(index, pd.DatetimeIndex) and end:
+                begin = index.searchsorted(
+                    index[-1] - pd.Timedelta(spec.duration), side='right')
+            else:
+                begin = max(end - int(spec.duration), 0)
+            bounds.append((begin, end))
+        else:
+            start, stop = spec[:2]
+            begin = 0 if start is None else \
+                index.searchsorted(start, side='left')
+            end = len(index) if stop is None else \
+                index.searchsorted(stop, side='right')
+            bounds.append((begin, max(begin, end)))
+
+    return np.array(bounds, dtype=int).reshape(-1, 2)
@@ -0,0 +1,200 @@
+"""Binary sidecar cache for parsed test data files."""
+import hashlib
+import json
+import os
+from os.path import exists, join
+import shutil
+
+import numpy as np
+
+
+CACHE_SUFFIX = '.cache'
+CACHE_VERSION = 3
+
+
+def cache_path(filepath):
+    """Return the path of the cache directory stored next to a file."""
+
+    return filepath + CACHE_SUFFIX
+
+
+def file_signature(filepath):
+    """Return the modification time, size and content digest of a file.
+
+    Parameters
+    ----------
+    filepath : string
+
+    Returns
+    -------
+    signature : dict
+        'mtime', 'size' and 'sha1' of the file
+
+    """
+
+    stat = os.stat(filepath)
+
+    return {
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'sha1': file_digest(filepath),
+    }
+
+
+def file_digest(filepath, blocksize=2 ** 20):
+    """Return the SHA-1 hex digest of the contents of a file."""
+
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def is_current(signature, filepath):
+    """Check whether a file still matches a recorded signature.
+
+    The size is compared first and the modification time second, the
+    contents are only hashed when the size matches but the file was
+    touched since the signature was recorded.
+
+    Parameters
+    ----------
+    signature : dict
+        signature recorded by file_signature
+    filepath : string
+
+    Returns
+    -------
+    current : bool
+
+    """
+
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return False
+
+    if stat.st_size != signature['size']:
+        return False
+    elif stat.st_mtime == signature['mtime']:
+        return True
+    else:
+        return file_digest(filepath) == signature['sha1']
+
+
+def save_cache(filepath, header, values, index):
+    """Write the cache of a parsed file.
+
+    Parameters
+    ----------
+    filepath : string
+        path of the source file the cache belongs to
+    header : dict
+        JSON serializable description of the parsed file, the source
+        file signature is added to it
+    values : ndarray
+        two-dimensional array of the raw data, stored in column-major
+        order so that each column is contiguous on disk
+    index : ndarray
+        row labels of the raw data
+
+    """
+
+    header = dict(header, version=CACHE_VERSION,
+                  source=file_signature(filepath))
+
+    write_directory(cache_path(filepath), header, {
+        'values': np.asfortranarray(values),
+        'index': index,
+    })
+
+
+def write_directory(path, header, arrays):
+    """Write a JSON header and NumPy arrays to a directory atomically.
+
+    The directory is written under a staging name first.  A previous
+    version is then renamed aside, the new one renamed into place and
+    only then the previous one deleted, so readers never see a directory
+    half written and a crash leaves at least one complete version on
+    disk.  Between the two renames, readers find no directory and treat
+    it as missing.
+
+    Parameters
+    ----------
+    path : string
+        path of the directory
+    header : dict
+        JSON serializable header, written to header.json
+    arrays : {ndarray}
+        arrays keyed by name, each written to <name>.npy
+
+    """
+
+    staging = '{0}.{1}.tmp'.format(path, os.getpid())
+    previous = '{0}.{1}.old'.format(path, os.getpid())
+    for stale in (staging, previous):
+        if exists(stale):
+            shutil.rmtree(stale)
+    os.mkdir(staging)
+    try:
+        for name, array in arrays.items():
+            np.save(join(staging, name + '.npy'), array)
+        with open(join(staging, 'header.json'), 'w') as f:
+            json.dump(header, f)
+        if exists(path):
+            os.rename(path, previous)
+        os.rename(staging, path)
+    finally:
+        if exists(staging):
+            shutil.rmtree(staging)
+        if exists(previous):
+            # Restore the previous version if the new one is not in place.
+            if exists(path):
+                shutil.rmtree(previous)
+            else:
+                os.rename(previous, path)
+
+
+def load_cache(filepath, mmap_mode='c'):
+    """Load the cache of a file if it is still current.
+
+    Parameters
+    ----------
+    filepath : string
+        path of the source file the cache belongs to
+    mmap_mode : str, optional
+        memory-map mode of the raw data, see numpy.load, the default
+        copy-on-write mode allows modifying the loaded values without
+        touching the cache
+
+    Returns
+    -------
+    cached : (dict, ndarray, ndarray) or None
+        header, memory-mapped values and index of the cache, None if
+        there is no cache or the source file changed since it was
+        written
+
+    """
+
+    path = cache_path(filepath)
+    try:
+        with open(join(path, 'header.json'), 'r') as f:
+            header = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if header.get('version') != CACHE_VERSION or \
+            not is_current(header['source'], filepath):
+        return None
+
+    try:
+        values = np.load(join(path, 'values.npy'), mmap_mode=mmap_mode)
+        index = np.load(join(path, 'index.npy'))
+    except (IOError, OSError, ValueError):
+        # Damaged caches and arrays that cannot be memory-mapped are
+        # treated as stale and rewritten on the next cached read.
+        return None
+
+    return header, values, index
@@ -44,6 +44,12 @@ if PY3:
     long = int
     unichr = chr
 
+    # read-only view of a mapping
+    from types import MappingProxyType as mappingproxy
+
+    # in-memory text file
+    from io import StringIO
+
     # list producing versions of major Python iterating functions
     def lrange(*args, **kwargs):
         return list(range(*args, **kwargs))
@@ -87,6 +93,12 @@ else:
     long = long
     unichr = unichr
 
+    # no read-only mapping view before Python 3.3, fall back to a copy
+    mappingproxy = dict
+
+    # in-memory file accepting the byte strings read from text files
+    from StringIO import StringIO
+
     # Python 2-builtin ranges produce lists
     lrange = builtins.range
     lzip = builtins.zip
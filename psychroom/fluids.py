@@ -0,0 +1,476 @@
+"""Tabulated fluid properties.
+
+Evaluating an equation of state sample by sample is far too slow for
+long test data, so properties are precomputed once per fluid on a dense
+grid of temperatures and pressures, stored on disk and memory-mapped on
+load, and whole columns are evaluated by bilinear interpolation.  Every
+grid cell carries an estimate of its worst interpolation error, so
+evaluations can report how far they may be off, e.g. in cells that
+straddle the saturation line.
+
+Tables are generated locally, by CoolProp when it is installed or by any
+other property function.  Temperatures are in degrees Celsius and
+pressures in kilopascals, as in the psychrometrics module, and columns
+with a unit property are converted to them.
+
+"""
+import json
+import os
+from os.path import exists, join
+
+import numpy as np
+import pandas as pd
+
+from cache import write_directory
+from unit import normalize, series_like
+
+try:
+    from CoolProp.CoolProp import PropsSI
+except ImportError:
+    PropsSI = None
+
+
+TABLE_SUFFIX = '.table'
+TABLE_VERSION = 1
+
+# CoolProp outputs of the tabulated properties and their scale to the
+# units of the tables, enthalpy in kJ/kg and density in kg/m3
+PROPERTIES = {'h': ('H', 1e-3), 'rho': ('D', 1.)}
+
+
+class FluidTable(object):
+
+    """Property table of a fluid over temperature and pressure.
+
+    Temperatures are spaced evenly and pressures logarithmically, so the
+    cell of any state is found by arithmetic, without a search.
+
+    Parameters
+    ----------
+    fluid : string
+        fluid name, e.g. 'R410A'
+    T : (float, float, int)
+        first and last temperature, degC, and number of temperatures
+    p : (float, float, int)
+        first and last pressure, kPa, and number of pressures
+    values : {ndarray}
+        property values on the grid keyed by property name, arrays of
+        shape (T size, p size)
+    errors : {ndarray}
+        interpolation error bound of each cell keyed by property name,
+        arrays of shape (T size - 1, p size - 1)
+
+    """
+
+    def __init__(self, fluid, T, p, values, errors):
+        self.fluid = fluid
+        self.T = tuple(T)
+        self.p = tuple(p)
+        self.values = values
+        self.errors = errors
+
+    def __repr__(self):
+        msg = '<FluidTable {0}: {1}, T {2[0]}..{2[1]} degC, ' \
+            'p {3[0]}..{3[1]} kPa>'
+        return msg.format(self.fluid, ', '.join(sorted(self.values)),
+                          self.T, self.p)
+
+    @property
+    def properties(self):
+        """Names of the tabulated properties."""
+
+        return sorted(self.values)
+
+    @property
+    def shape(self):
+        """Number of temperatures and pressures of the grid."""
+
+        return self.T[2], self.p[2]
+
+    def temperatures(self):
+        """Return the temperatures of the grid, degC."""
+
+        return np.linspace(*self.T)
+
+    def pressures(self):
+        """Return the pressures of the grid, kPa."""
+
+        return np.exp(np.linspace(np.log(self.p[0]), np.log(self.p[1]),
+                                  self.p[2]))
+
+    def evaluate(self, name, T, p, bounds=False):
+        """Interpolate a property at given states.
+
+        Parameters
+        ----------
+        name : string
+            property name, one of properties
+        T : array_like
+            temperature, degC
+        p : array_like
+            pressure, kPa
+        bounds : bool, optional
+            also return the error bound of each value
+
+        Returns
+        -------
+        values : ndarray or pandas Series
+            property values, NaN outside of the table
+        errors : ndarray or pandas Series
+            error bound of each value, only if bounds is True
+
+        """
+
+        if name not in self.values:
+            msg = '{0} has no property {1!r}, only {2}'
+            raise KeyError(msg.format(self.fluid, name, self.properties))
+
+        cell = self._locate(T, p)
+        values = series_like(self._interpolate(self.values[name], cell), T)
+        if not bounds:
+            return values
+
+        return values, series_like(self._bound(self.errors[name], cell), T)
+
+    def _locate(self, T, p):
+        """Return the flat cell index and fractions of states in cells.
+
+        States outside of the table get a cell index of -1.
+
+        """
+
+        t = np.asarray(normalize(T, 'temperature'), dtype=float)
+        lnp = np.log(np.asarray(normalize(p, 'pressure'), dtype=float))
+        t, lnp = np.broadcast_arrays(t, lnp)
+
+        (t0, t1, m), (p0, p1, n) = self.T, self.p
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x = (t - t0) * ((m - 1) / float(t1 - t0))
+            y = (lnp - np.log(p0)) * ((n - 1) / np.log(p1 / float(p0)))
+        inside = (x >= 0) & (x <= m - 1) & (y >= 0) & (y <= n - 1)
+
+        # The last temperature and pressure fall in the last cell.
+        i = np.clip(np.floor(np.where(inside, x, 0.)), 0, m - 2)
+        j = np.clip(np.floor(np.where(inside, y, 0.)), 0, n - 2)
+        index = np.where(inside, i * n + j, -1).astype(np.intp)
+
+        return index, x - i, y - j
+
+    def _interpolate(self, table, cell):
+        """Return the bilinear interpolation of a table in cells."""
+
+        index, fx, fy = cell
+        n = self.p[2]
+        flat = np.ravel(table)
+        k = np.where(index < 0, 0, index)
+        v00, v01 = flat.take(k), flat.take(k + 1)
+        v10, v11 = flat.take(k + n), flat.take(k + n + 1)
+
+        a = v00 + fy * (v01 - v00)
+        b = v10 + fy * (v11 - v10)
+
+        return np.where(index < 0, np.nan, a + fx * (b - a))
+
+    def _bound(self, errors, cell):
+        """Return the error bound of the cells of states."""
+
+        index = cell[0]
+        n = self.p[2]
+        # Cell indices count grid nodes, the error arrays count cells.
+        k = np.where(index < 0, 0, index - index // n)
+
+        return np.where(index < 0, np.nan, np.ravel(errors).take(k))
+
+
+def build_table(fluid, T=(-40., 150., 381), p=(50., 5000., 401),
+                properties=('h', 'rho'), source=None):
+    """Tabulate the properties of a fluid.
+
+    The property function is evaluated on a grid twice as fine as the
+    table, and the error bound of each cell is twice the largest
+    difference between the function and the interpolation at the cell
+    center and the midpoints of its edges.  The error of smooth
+    properties peaks there, and across a discontinuity, such as the
+    saturation line, it is at least half the jump, so the bound holds
+    in both kinds of cells.
+
+    Parameters
+    ----------
+    fluid : string
+        fluid name, passed on to the property function
+    T : (float, float, int), optional
+        first and last temperature, degC, and number of temperatures
+    p : (float, float, int), optional
+        first and last pressure, kPa, and number of pressures, which
+        are spaced logarithmically
+    properties : [string], optional
+        names of the properties to tabulate, keys of PROPERTIES for
+        CoolProp
+    source : callable, optional
+        property function called as source(name, T, p, fluid) with
+        arrays of temperatures, degC, and pressures, kPa, returning an
+        array of property values, CoolProp by default
+
+    Returns
+    -------
+    table : FluidTable
+
+    Examples
+    --------
+    Tabulate the enthalpy of an ideal gas with a constant specific heat:
+
+    >>> def ideal_gas(name, T, p, fluid):
+    ...     return 1.005 * T
+    >>> table = build_table('air', T=(0., 100., 11), p=(100., 200., 3),
+    ...                     properties=['h'], source=ideal_gas)
+    >>> table.evaluate('h', np.array([25., 150.]), 101.325)
+    array([25.125,    nan])
+
+    """
+
+    if source is None:
+        source = _coolprop
+    T = (float(T[0]), float(T[1]), int(T[2]))
+    p = (float(p[0]), float(p[1]), int(p[2]))
+    if T[2] < 2 or p[2] < 2 or not T[0] < T[1] or not 0 < p[0] < p[1]:
+        msg = 'invalid table axes T={0} and p={1}'
+        raise ValueError(msg.format(T, p))
+
+    fine = FluidTable(fluid, T[:2] + (2 * T[2] - 1,),
+                      p[:2] + (2 * p[2] - 1,), {}, {})
+    grid_T, grid_p = np.meshgrid(fine.temperatures(), fine.pressures(),
+                                 indexing='ij')
+
+    values, errors = {}, {}
+    for name in properties:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sample = np.asarray(source(name, grid_T, grid_p, fluid),
+                                dtype=float).reshape(grid_T.shape)
+        sample[~np.isfinite(sample)] = np.nan
+        values[name] = np.ascontiguousarray(sample[::2, ::2])
+        errors[name] = _cell_errors(sample)
+
+    return FluidTable(fluid, T, p, values, errors)
+
+
+def _cell_errors(sample):
+    """Return the interpolation error bounds of the cells of a table.
+
+    The sample holds the property on a grid twice as fine as the table,
+    the nodes of the table at even indices and the midpoints between
+    them at odd ones.
+
+    """
+
+    nodes = sample[::2, ::2]
+    with np.errstate(invalid='ignore'):
+        # Edge midpoints along pressure and temperature, and centers
+        along_p = np.abs(sample[::2, 1::2] -
+                         (nodes[:, :-1] + nodes[:, 1:]) / 2)
+        along_T = np.abs(sample[1::2, ::2] - (nodes[:-1] + nodes[1:]) / 2)
+        center = np.abs(sample[1::2, 1::2] - (
+            nodes[:-1, :-1] + nodes[:-1, 1:] + nodes[1:, :-1] +
+            nodes[1:, 1:]) / 4)
+        errors = 2 * np.maximum.reduce([
+            along_p[:-1], along_p[1:], along_T[:, :-1], along_T[:, 1:],
+            center,
+        ])
+
+    return np.ascontiguousarray(errors)
+
+
+def _coolprop(name, T, p, fluid):
+    """Evaluate a property with CoolProp at temperatures and pressures."""
+
+    if PropsSI is None:
+        raise ImportError('CoolProp is required to tabulate fluid '
+                          'properties without a source function')
+    if name not in PROPERTIES:
+        msg = 'unknown property {0!r}, expected one of {1}'
+        raise ValueError(msg.format(name, sorted(PROPERTIES)))
+    output, scale = PROPERTIES[name]
+
+    values = np.full(np.shape(T), np.nan)
+    flat_T, flat_p = np.ravel(T), np.ravel(p)
+    result = values.reshape(-1)
+    for pos in range(len(flat_T)):
+        try:
+            result[pos] = PropsSI(output, 'T', flat_T[pos] + 273.15,
+                                  'P', flat_p[pos] * 1e3, fluid)
+        except ValueError:
+            # Two-phase and out of range states stay undefined.
+            pass
+
+    return values * scale
+
+
+def save_table(table, path):
+    """Write a property table to disk.
+
+    The table is a directory holding a JSON header and one NumPy file
+    of values and one of error bounds per property, see
+    cache.write_directory.
+
+    Parameters
+    ----------
+    table : FluidTable
+    path : string
+        path of the table directory
+
+    """
+
+    header = {
+        'version': TABLE_VERSION,
+        'fluid': table.fluid,
+        'T': list(table.T),
+        'p': list(table.p),
+        'properties': table.properties,
+    }
+
+    arrays = {}
+    for name in table.properties:
+        arrays[name] = table.values[name]
+        arrays[name + '.error'] = table.errors[name]
+    write_directory(path, header, arrays)
+
+
+def load_table(path, mmap_mode='r'):
+    """Load a property table from disk.
+
+    Parameters
+    ----------
+    path : string
+        path of the table directory
+    mmap_mode : str, optional
+        memory-map mode of the values and error bounds, see numpy.load,
+        so only the pages of the table that are evaluated are read
+
+    Returns
+    -------
+    table : FluidTable or None
+        the table, None if there is none or it was written by another
+        version
+
+    """
+
+    try:
+        with open(join(path, 'header.json'), 'r') as f:
+            header = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if header.get('version') != TABLE_VERSION:
+        return None
+
+    values, errors = {}, {}
+    for name in header['properties']:
+        values[name] = np.load(join(path, name + '.npy'),
+                               mmap_mode=mmap_mode)
+        errors[name] = np.load(join(path, name + '.error.npy'),
+                               mmap_mode=mmap_mode)
+
+    return FluidTable(header['fluid'], header['T'], header['p'], values,
+                      errors)
+
+
+def get_table(fluid, directory, **kwargs):
+    """Load the property table of a fluid, building it if needed.
+
+    Parameters
+    ----------
+    fluid : string
+        fluid name
+    directory : string
+        directory of the tables, the table of a fluid is stored in it as
+        <fluid>.table
+    **kwargs
+        T, p, properties and source, see build_table, a stored table is
+        rebuilt when its axes or properties differ from the requested
+        ones
+
+    Returns
+    -------
+    table : FluidTable
+
+    """
+
+    path = join(directory, fluid + TABLE_SUFFIX)
+    table = load_table(path)
+    if table is not None and _matches(table, kwargs):
+        return table
+
+    table = build_table(fluid, **kwargs)
+    if not exists(directory):
+        os.makedirs(directory)
+    save_table(table, path)
+
+    return load_table(path)
+
+
+def _matches(table, kwargs):
+    """Check whether a table has the axes and properties of build args."""
+
+    for key in ('T', 'p'):
+        if key in kwargs and \
+                not np.allclose(getattr(table, key), kwargs[key]):
+            return False
+
+    properties = kwargs.get('properties')
+
+    return properties is None or set(properties) <= set(table.values)
+
+
+def fluid_properties(table, T, p, bounds=False):
+    """Return all tabulated properties of a fluid at given states.
+
+    Parameters
+    ----------
+    table : FluidTable
+    T : array_like
+        temperature, degC
+    p : array_like
+        pressure, kPa
+    bounds : bool, optional
+        also return the error bounds
+
+    Returns
+    -------
+    result : pandas DataFrame
+        one column per property, indexed like T
+    errors : pandas DataFrame
+        error bound of each value, only if bounds is True
+
+    Examples
+    --------
+    Refrigerant properties at the compressor inlet of a test:
+
+    >>> from io_ import read_
+    >>> data = read_('test_data/test_001.htf')
+    >>> def ideal_gas(name, T, p, fluid):
+    ...     return 1.005 * T if name == 'h' else p / (0.287 * (T + 273.15))
+    >>> table = build_table('air', T=(-5., 5., 11), p=(90., 110., 5),
+    ...                     source=ideal_gas)
+    >>> props = fluid_properties(table, data['comp_ref_in_T'], 101.325)
+    >>> props.columns.tolist()
+    ['h', 'rho']
+    >>> props.index.equals(data.index)
+    True
+
+    """
+
+    cell = table._locate(T, p)
+    index = getattr(T, 'index', None)
+    names = table.properties
+
+    result = pd.DataFrame(
+        {name: table._interpolate(table.values[name], cell)
+         for name in names},
+        index=index, columns=names)
+    if not bounds:
+        return result
+
+    errors = pd.DataFrame(
+        {name: table._bound(table.errors[name], cell) for name in names},
+        index=index, columns=names)
+
+    return result, errors
@@ -1,23 +1,98 @@
 """Experimental data input/output handler functions."""
-# TODO Uncertainty
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 import os
 from os.path import join
+import re
+import time
+import warnings
 
+import numpy as np
 import pandas as pd
 
-from label_handler import translate_keys
-from unit import Unit
-from compat import (casefold, filter, isdecimal, isidentifier)
+from averaging import window_statistics
+from cache import (CACHE_SUFFIX, file_signature, is_current, load_cache,
+                   save_cache)
+from label_handler import (LabelIndex, index_labels, translate_keys,
+                           translate_label)
+from uncertainty import UNCERTAINTY_SECTION, append_uncertainty
+from unit import UNIT_SYSTEMS, Unit, convert, get_unit
+from util import LRUCache
+from compat import (StringIO, casefold, filter, isidentifier, zip)
+
+
+MetadataInfo = namedtuple('MetadataInfo', ['value', 'unit'])
+LoadChanges = namedtuple('LoadChanges', ['added', 'modified', 'removed'])
+
+_SECTION_RE = re.compile(r'\[\s*(?P<section>[^\[\]]*?)\s*\]\Z')
+_ENTRY_RE = re.compile(
+    r'(?P<key>[^=\[\]]*[^=\[\]\s])\s*=\s*'
+    r'(?P<value>[^\[]*?)\s*(?:\[(?P<unit>[^\]]*)\])?\Z'
+)
+_INFO_RE = re.compile(r'(?P<value>[^\[]*?)\s*(?:\[(?P<unit>[^\]]*)\]?)?\Z')
+_INT_RE = re.compile(r'[-+]?\d+\Z')
+_FLOAT_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\Z')
+
+_ASCII_RE = re.compile(r'[\x00-\x7f]*\Z')
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+_BAD_CHAR_RE = re.compile(r'[^A-Za-z0-9_]')
+_BAD_START_RE = re.compile(r'\A[^A-Za-z_]+')
+_LEADING_DIGIT_RE = re.compile(r'\A[0-9]')
+_NAME_CACHE = LRUCache(4096)
+
+TIME_FIELDS = (
+    ('yyyy', '%Y'),
+    ('mm', '%m'),
+    ('dd', '%d'),
+    ('HH', '%H'),
+    ('MM', '%M'),
+    ('SS', '%S'),
+)
+_TIME_FIELD_RE = re.compile('|'.join(field for field, _ in TIME_FIELDS))
+_TIME_SPEC_RE = re.compile(
+    r'(?:{0}|[-/:. T])+\Z'.format(_TIME_FIELD_RE.pattern)
+)
+
+
+class MetadataError(Exception):
+
+    """Exception raised for malformed test data file headers.
+
+    Parameters
+    ----------
+    message : explanation of the error
+    lineno : int, optional
+        number of the offending line in the test data file
+
+    """
+
+    def __init__(self, message, lineno=None):
+        if lineno is not None:
+            message = 'line {0}: {1}'.format(lineno, message)
+        Exception.__init__(self, message)
+        self.message = message
+        self.lineno = lineno
 
 
-def load_(filepath, ext='.htf', **kwargs):
+def load_(filepath, ext='.htf', workers=None, executor=None, windows=None,
+          **kwargs):
     """Load a collection of test data and return pandas DataFrames.
 
     Parameters
     ----------
     filepath : str
         directory containing experimental data files
+    ext : str, optional
+        file extension of the experimental data files
+    workers : int, optional
+        number of worker processes used to parse the files in parallel,
+        files are parsed one after another in the current process if
+        None or 1
+    executor : concurrent.futures.Executor, optional
+        executor used to parse the files instead of creating a process
+        pool, takes precedence over workers
+    windows : window spec, [window spec] or dict, optional
+        windows the summary averages each test over, see summarize
 
     Returns
     -------
@@ -26,34 +101,406 @@ def load_(filepath, ext='.htf', **kwargs):
     summary : pandas DataFrame
         a summary data frame of the data from all the test files
 
+    Examples
+    --------
+    Summarize the last five minutes of each test:
+
+    >>> from averaging import Last
+    >>> data, summary = load_('test_data', windows=Last('5min'))
+    >>> summary.index.tolist()
+    [(0, 0), (1, 0)]
+
+    Notes
+    -----
+    Files that fail to parse are skipped with a warning rather than
+    aborting the whole batch, their index is left out of data.
+
+    """
+
+    paths = _find_files(filepath, ext)
+
+    data = {}
+    for ind, (path, result) in enumerate(
+            zip(paths, _read_many(paths, workers, executor, **kwargs))):
+        if isinstance(result, Exception):
+            msg = 'skipped {0}: {1!r}'.format(path, result)
+            warnings.warn(msg, RuntimeWarning)
+        else:
+            data[ind] = result
+
+    return data, summarize(data, windows)
+
+
+def _find_files(filepath, ext):
+    """Return the sorted paths of the files with an extension in a tree.
+
+    Cache directories written next to the test data files are skipped.
+
     """
 
     is_ext = lambda s: True if s.endswith(ext) else False
 
-    for root, _, files in os.walk(filepath):
-        data = {
-            ind: read_(join(root, f), **kwargs)
-            for ind, f in enumerate(filter(is_ext, sorted(files)))
-        }
+    paths = []
+    for root, dirs, files in os.walk(filepath):
+        dirs[:] = sorted(d for d in dirs if not d.endswith(CACHE_SUFFIX))
+        paths.extend(join(root, f) for f in filter(is_ext, sorted(files)))
+
+    return paths
+
+
+class IncrementalLoader(object):
+
+    """Keep a directory of test data loaded across repeated loads.
+
+    A manifest records the modification time, size and content digest
+    of every file read.  Each update only parses the files that are new
+    or changed since the previous update, drops the ones that were
+    deleted, and updates the affected summary rows in place of
+    rebuilding the summary from all the data.
+
+    Parameters
+    ----------
+    filepath : str
+        directory containing experimental data files
+    ext : str, optional
+        file extension of the experimental data files
+    workers : int, optional
+        number of worker processes used to parse changed files
+    executor : concurrent.futures.Executor, optional
+        executor used to parse changed files, see load_
+    **kwargs
+        keyword arguments passed on to read_
+
+    Attributes
+    ----------
+    data : {pandas DataFrame}
+        test data frames keyed by file path
+    summary : pandas DataFrame
+        summary of the test data as returned by summarize, indexed by
+        file path
+    manifest : {dict}
+        signature of every file read, see cache.file_signature,
+        including the ones that failed to parse
+    changes : LoadChanges
+        paths added, modified and removed by the last update
+
+    Examples
+    --------
+    >>> loader = IncrementalLoader('test_data')
+    >>> data, summary = loader.update()
+    >>> len(loader.changes.added), len(summary)
+    (2, 2)
+    >>> data, summary = loader.update()
+    >>> loader.changes
+    LoadChanges(added=[], modified=[], removed=[])
+
+    """
+
+    def __init__(self, filepath, ext='.htf', workers=None, executor=None,
+                 **kwargs):
+        self.filepath = filepath
+        self.ext = ext
+        self.workers = workers
+        self.executor = executor
+        self.kwargs = kwargs
+        self.data = {}
+        self.summary = summarize({})
+        self.manifest = {}
+        self.changes = LoadChanges([], [], [])
+        self._columns = {}
+
+    def update(self):
+        """Reload the files that changed since the last update.
+
+        Returns
+        -------
+        data : {pandas DataFrame}
+            test data frames keyed by file path
+        summary : pandas DataFrame
+            summary data frame of all the test files
+
+        """
+
+        paths = _find_files(self.filepath, self.ext)
+        removed = sorted(set(self.manifest).difference(paths))
+        added = [path for path in paths if path not in self.manifest]
+        modified = [path for path in paths if path in self.manifest and
+                    not self._is_current(path)]
+
+        for path in removed + modified:
+            del self.manifest[path]
+            self.data.pop(path, None)
+            self._columns.pop(path, None)
+
+        # Record signatures before parsing, so that files written to
+        # while being parsed are read again by the next update.
+        changed = []
+        for path in added + modified:
+            try:
+                self.manifest[path] = file_signature(path)
+            except (IOError, OSError):
+                continue
+            changed.append(path)
+
+        new = {}
+        for path, result in zip(
+                changed, _read_many(changed, self.workers, self.executor,
+                                    **self.kwargs)):
+            if isinstance(result, Exception):
+                msg = 'skipped {0}: {1!r}'.format(path, result)
+                warnings.warn(msg, RuntimeWarning)
+            else:
+                new[path] = result
+                self._columns[path] = _summary_columns(result)
+        self.data.update(new)
+
+        self.summary = self._update_summary(removed + modified, new, paths)
+        self.changes = LoadChanges(added, modified, removed)
+
+        return self.data, self.summary
+
+    def _is_current(self, path):
+        """Check a file against the manifest, refreshing its mtime."""
+
+        signature = self.manifest[path]
+        if not is_current(signature, path):
+            return False
+
+        # A touched but unchanged file only needs hashing once.
+        signature['mtime'] = os.stat(path).st_mtime
+
+        return True
+
+    def _update_summary(self, stale, new, paths):
+        """Replace the summary rows of stale files by those of new files.
+
+        Parameters
+        ----------
+        stale : [str]
+            paths of the removed and modified files
+        new : {pandas DataFrame}
+            newly parsed test data frames keyed by file path
+        paths : [str]
+            paths of all the test data files in row order
+
+        Returns
+        -------
+        summary : pandas DataFrame
+
+        """
+
+        summary = self.summary
+        units = dict(summary.units)
+        drop = [path for path in stale if path in summary.index]
+        if drop:
+            summary = summary.drop(drop)
+        if new:
+            rows = summarize(new)
+            units.update(rows.units)
+            summary = pd.concat([summary, rows])
+
+        # Columns only the dropped files provided leave the summary.
+        columns = set()
+        for keys in self._columns.values():
+            columns.update(keys)
+        columns = [key for key in summary.columns if key in columns]
+        rows = [path for path in paths if path in self.data]
+
+        summary = summary.reindex(index=rows, columns=columns)
+        units = {key: units[key] for key in columns}
+        for key in columns:
+            summary[key].unit = units[key]
+        summary.units = units
+
+        return summary
+
+
+def _summary_columns(frame):
+    """Return the summary column labels of a test data frame."""
+
+    columns = set(frame.keys())
+    for section, metadata in frame.metadata.items():
+        if section != UNCERTAINTY_SECTION:
+            columns.update(metadata)
+
+    return columns
+
+
+def summarize(data, windows=None):
+    """Summarize a collection of test data in a single DataFrame.
+
+    Parameters
+    ----------
+    data : {pandas DataFrame}
+        dictionary of test data frames, usually returned by load_
+    windows : window spec, [window spec] or dict, optional
+        windows to average each test over instead of the whole test, see
+        averaging.window_statistics, or a dictionary of them keyed like
+        data, the summary then has a row per test and window indexed by
+        the test key and window number
+
+    Returns
+    -------
+    summary : pandas DataFrame
+        one row per test with the mean of each measurement and the
+        metadata values of the test, except for the uncertainties,
+        metadata takes precedence over a measurement with the same label
+        and values missing from a test are NaN, with windows each mean
+        is followed by the standard deviation <key>_std and number of
+        samples <key>_count of the measurement over the window
+
+    Examples
+    --------
+    >>> from averaging import Last
+    >>> data, _ = load_('test_data')
+    >>> summary = summarize(data, Last('10min'))
+    >>> summary[['comp_ref_in_T_count', 'tester']].values.tolist()
+    [[10, 'Andrew Hjortland'], [10, 'Andrew Hjortland']]
 
-    summary = pd.DataFrame(
-        data={name: item.mean() for name, item in data.items()}
-    ).T
-    for key in summary.keys():
-        summary[key].unit = data[0][key].unit
-    for id_, _ in summary.iterrows():
+    """
+
+    ids = sorted(data)
+    columns, units = [], {}
+    for id_ in ids:
+        for key in data[id_].keys():
+            if key not in units:
+                columns.append(key)
+                units[key] = getattr(data[id_][key], 'unit', None)
+
+    # Each test has one summary row, or one per window
+    rows, tests, means, stds, counts = [], [], [], [], []
+    for id_ in ids:
+        if windows is None:
+            rows.append(id_)
+            mean = data[id_].mean().reindex(columns).values[None]
+        else:
+            spec = windows.get(id_, []) if isinstance(windows, dict) \
+                else windows
+            stats = window_statistics(data[id_], spec)
+            rows.extend((id_, pos) for pos in range(len(stats.mean)))
+            mean = stats.mean.reindex(columns=columns).values
+            stds.append(stats.std.reindex(columns=columns).values)
+            counts.append(stats.count.reindex(columns=columns).values)
+        tests.extend([id_] * len(mean))
+        means.append(mean)
+    means = _stack_rows(means, len(columns))
+    values = {key: list(means[:, ind]) for ind, key in enumerate(columns)}
+
+    if windows is not None:
+        stds = _stack_rows(stds, len(columns))
+        counts = _stack_rows(counts, len(columns))
+        measurements, columns = columns, []
+        for ind, key in enumerate(measurements):
+            columns.extend([key, key + '_std', key + '_count'])
+            values[key + '_std'] = list(stds[:, ind])
+            values[key + '_count'] = list(counts[:, ind])
+            units[key + '_std'] = units[key]
+            units[key + '_count'] = None
+
+    for pos, id_ in enumerate(tests):
         for section, metadata in data[id_].metadata.items():
+            if section == UNCERTAINTY_SECTION:
+                continue
             for key, info in metadata.items():
-                if key in summary.keys():
-                    summary[key][id_], summary[key].unit = info
-                else:
-                    summary[key] = info.value
-                    summary[key].unit = info.unit
+                if key not in values:
+                    columns.append(key)
+                    values[key] = [np.nan] * len(rows)
+                values[key][pos] = info.value
+                units[key] = info.unit
+
+    index = rows if windows is None else \
+        pd.MultiIndex.from_tuples(rows, names=['test', 'window'])
+    summary = pd.DataFrame(values, index=index, columns=columns)
+    for key in columns:
+        summary[key].unit = units[key]
+    summary.units = units
+
+    return summary
+
+
+def _stack_rows(blocks, width):
+    """Stack blocks of summary rows into one array."""
+
+    return np.vstack(blocks) if blocks else np.empty((0, width))
+
+
+def _read_many(paths, workers=None, executor=None, **kwargs):
+    """Read a list of test data files, optionally in parallel.
+
+    Parameters
+    ----------
+    paths : [str]
+        test data file paths
+    workers : int, optional
+        number of worker processes, None or 1 reads in this process
+    executor : concurrent.futures.Executor, optional
+        executor used instead of creating a process pool
+
+    Returns
+    -------
+    results : [pandas DataFrame or Exception]
+        parsed data frames in the same order as paths, or the exception
+        raised while reading the corresponding file
+
+    """
+
+    if executor is None and (not workers or workers == 1):
+        return [_read_safely(path, kwargs) for path in paths]
+
+    owner = None
+    if executor is None:
+        owner = executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_read_payload, path, kwargs)
+                   for path in paths]
+        results = []
+        for future in futures:
+            try:
+                results.append(_unpack_payload(*future.result()))
+            except Exception as err:
+                results.append(err)
+    finally:
+        if owner is not None:
+            owner.shutdown()
+
+    return results
+
+
+def _read_safely(filepath, kwargs):
+    """Read a test data file, returning the exception on failure."""
+
+    try:
+        return read_(filepath, **kwargs)
+    except Exception as err:
+        return err
 
-    return data, summary
 
+def _read_payload(filepath, kwargs):
+    """Read a test data file into a picklable payload.
 
-def read_(filepath_or_buffer, header=0, units=1, **kwargs):
+    DataFrame attributes such as units, descriptions and metadata are
+    not preserved by pickling, so they are returned alongside the data
+    frame for reattachment by the parent process.
+
+    """
+
+    result = read_(filepath, **kwargs)
+
+    return result, get_units(result), result.metadata
+
+
+def _unpack_payload(result, units, metadata):
+    """Reattach the properties stripped from a worker payload."""
+
+    result = append_column_metadata(
+        result, [units[key].parts for key in result.keys()])
+
+    return append_metadata(result, metadata)
+
+
+def read_(filepath_or_buffer, header=0, units=1, cache=False,
+          components=None, fluids=None, locations=None, types=None,
+          uncertainty=None, **kwargs):
     """Read experimental data into pandas DataFrame.
 
     Parameters
@@ -64,51 +511,595 @@ def read_(filepath_or_buffer, header=0, units=1, **kwargs):
         Row to use for the column labels of the parsed DataFrame.
     units : int
         Row to use for the unit properties of the parsed DataFrame.
+    cache : bool, optional
+        Reuse a binary cache stored next to the file, written on the
+        first read, instead of parsing the text file.  The cache is
+        rebuilt when the file changes.
+    components, fluids, locations, types : [string], optional
+        Only read the columns whose measurement label has one of the
+        given component, fluid, location and type abbreviations, see
+        label_handler.LabelIndex.query.
+    uncertainty : string, optional
+        sidecar file with an [uncertainty] section declaring instrument
+        uncertainties, which take precedence over those declared in the
+        header, see uncertainty.declared_uncertainties
 
     Returns
     -------
     result : pandas DataFrame
 
+    Examples
+    --------
+    Read only the compressor temperatures:
+
+    >>> data = read_('test_data/test_001.htf', components=['comp'],
+    ...              types=['T'])
+    >>> list(data.keys())
+    ['comp_ref_in_T', 'comp_ref_out_T']
+
     """
 
-    with open(filepath_or_buffer, 'r') as f:
+    facets = _facet_filter(components, fluids, locations, types)
+
+    result = None
+    if cache:
+        result = _read_cache(filepath_or_buffer, kwargs, facets)
+
+    if result is None:
+        result = _read_file(filepath_or_buffer, cache, facets, kwargs)
+
+    if uncertainty is not None:
+        metadata = dict(result.metadata)
+        metadata[UNCERTAINTY_SECTION] = dict(
+            metadata.get(UNCERTAINTY_SECTION, {}),
+            **read_uncertainty(uncertainty)
+        )
+        result = append_metadata(result, metadata)
+
+    return result
+
+
+def _read_file(filepath, cache, facets, kwargs):
+    """Parse a test data file, writing its cache if requested."""
+
+    # The cache holds every column so that other selections reuse it.
+    parser_kwargs = dict(kwargs)
+    if not cache:
+        parser_kwargs.update(_facet_kwargs(facets))
+
+    with open(filepath, 'r') as f:
         metadata = parse_metadata(f)
-        result = parse_raw_data(f, **kwargs)
+        result = parse_raw_data(f, **parser_kwargs)
 
     result = append_metadata(result, metadata)
 
+    if cache:
+        _write_cache(filepath, result, kwargs)
+        if facets:
+            cached = _read_cache(filepath, kwargs, facets)
+            if cached is None:
+                keys = result.label_index.query(**facets)
+                cached = append_column_metadata(
+                    result[keys],
+                    [result.units[key].parts for key in keys])
+                cached = append_metadata(cached, metadata)
+            result = cached
+
     return result
 
 
-def parse_metadata(handle):
+def read_uncertainty(filepath):
+    """Read the instrument uncertainties declared in a sidecar file.
+
+    Parameters
+    ----------
+    filepath : string
+        file with an [uncertainty] section of key = value [unit]
+        entries, in the format of test data file headers
+
+    Returns
+    -------
+    declarations : {MetadataInfo}
+        uncertainty declarations keyed by column label or label type
+
+    """
+
+    with open(filepath, 'r') as f:
+        metadata = parse_metadata(f, until=None)
+
+    return metadata.get(UNCERTAINTY_SECTION, {})
+
+
+def read_lazy(filepath, **kwargs):
+    """Read experimental data, materializing columns only when accessed.
+
+    The raw data is memory-mapped from the binary cache of the file,
+    which is written first if it is missing or stale.  Metadata and
+    units are available immediately, column values are only read from
+    disk once selected.
+
+    Parameters
+    ----------
+    filepath : string
+        test data file path
+
+    Returns
+    -------
+    result : LazyFrame
+        lazily loaded measurement data, or the fully parsed pandas
+        DataFrame if the file cannot be cached
+
+    Examples
+    --------
+    Select the columns to load with a list, as with usecols, here from
+    a copy of a test data file so the cache is written next to it:
+
+    >>> import shutil, tempfile
+    >>> directory = tempfile.mkdtemp()
+    >>> filepath = join(directory, 'test_001.htf')
+    >>> shutil.copyfile('test_data/test_001.htf', filepath) and None
+    >>> frame = read_lazy(filepath)
+    >>> sorted(frame[['comp_ref_in_T', 'comp_ref_in_pa']].keys())
+    ['comp_ref_in_T', 'comp_ref_in_pa']
+    >>> shutil.rmtree(directory)
+
+    """
+
+    cached = _load_cache(filepath, kwargs, mmap_mode='r')
+    if cached is None:
+        result = read_(filepath, cache=True, **kwargs)
+        cached = _load_cache(filepath, kwargs, mmap_mode='r')
+        if cached is None:
+            return result
+
+    return LazyFrame(*cached)
+
+
+class LazyFrame(object):
+
+    """Measurement data memory-mapped from a binary cache.
+
+    Columns are read from the memory-mapped raw data the first time
+    they are accessed and kept afterwards.  Selecting a list of columns
+    returns a pandas DataFrame of only those columns.
+
+    Parameters
+    ----------
+    header : dict
+        binary cache header
+    values : ndarray
+        memory-mapped column-major raw data
+    index : ndarray
+        row labels of the raw data
+
+    """
+
+    def __init__(self, header, values, index):
+        self._values = values
+        self._positions = {key: ind for ind, key in
+                           enumerate(header['columns'])}
+        self._columns = {}
+        self.index = pd.Index(index, name=header['name'])
+        self.units = {key: get_unit(tuple(unit)) for key, unit in
+                      zip(header['columns'], header['units'])}
+        self.label_index = LabelIndex(header['columns'])
+        append_metadata(self, _decode_metadata(header))
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def __getitem__(self, key):
+        if isinstance(key, (list, tuple)):
+            return self.to_frame(key)
+
+        if key not in self._columns:
+            values = np.array(self._values[:, self._positions[key]])
+            column = pd.Series(values, index=self.index, name=key)
+            column.unit = self.units[key]
+            column.description = translate_label(key)
+            if key in getattr(self, 'uncertainties', {}):
+                column.uncertainty = self.uncertainties[key]
+            self._columns[key] = column
+
+        return self._columns[key]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.index)
+
+    def keys(self):
+        """Column labels of the measurement data."""
+        return sorted(self._positions, key=self._positions.get)
+
+    def to_frame(self, keys=None):
+        """Materialize columns into a pandas DataFrame.
+
+        Parameters
+        ----------
+        keys : [string], optional
+            column labels to load, all columns if None
+
+        Returns
+        -------
+        result : pandas DataFrame
+            measurement DataFrame with the same properties as the
+            DataFrame returned by read_
+
+        """
+
+        keys = self.keys() if keys is None else list(keys)
+        result = pd.DataFrame({key: self[key] for key in keys},
+                              index=self.index, columns=keys)
+        result = append_column_metadata(
+            result, [self.units[key].parts for key in keys])
+
+        return append_metadata(result, self.metadata)
+
+
+def _load_cache(filepath, kwargs, mmap_mode='c'):
+    """Load the binary cache of a file written with the same arguments.
+
+    Returns
+    -------
+    cached : (dict, ndarray, ndarray) or None
+        header, values and index of the cache, None if the cache is
+        missing, stale or was written with other parser arguments
+
+    """
+
+    cached = load_cache(filepath, mmap_mode=mmap_mode)
+    if cached is None or cached[0]['options'] != repr(sorted(kwargs.items())):
+        return None
+
+    return cached
+
+
+def _decode_metadata(header):
+    """Decode the metadata stored in a binary cache header."""
+
+    return {
+        section: {
+            key: MetadataInfo(value,
+                              get_unit(tuple(unit)) if is_unit else unit)
+            for key, (value, unit, is_unit) in meta.items()
+        }
+        for section, meta in header['metadata'].items()
+    }
+
+
+def _read_cache(filepath, kwargs, facets=None):
+    """Load a parsed test data file from its binary cache.
+
+    Parameters
+    ----------
+    filepath : string
+        test data file path
+    kwargs : dict
+        parser arguments the cache must have been written with
+    facets : dict, optional
+        label facet filter selecting the columns to load
+
+    Returns
+    -------
+    result : pandas DataFrame or None
+        None if the cache is missing, stale or was written with other
+        parser arguments
+
+    """
+
+    cached = _load_cache(filepath, kwargs)
+    if cached is None:
+        return None
+    header, values, index = cached
+    columns, units = header['columns'], header['units']
+    if facets:
+        keep = set(LabelIndex(columns).query(**facets))
+        positions = [ind for ind, key in enumerate(columns) if key in keep]
+        values = values[:, positions]
+        columns = [columns[ind] for ind in positions]
+        units = [units[ind] for ind in positions]
+
+    result = pd.DataFrame(values, index=pd.Index(index, name=header['name']),
+                          columns=columns)
+    result = append_column_metadata(result, [tuple(unit) for unit in units])
+
+    return append_metadata(result, _decode_metadata(header))
+
+
+def _write_cache(filepath, data, kwargs):
+    """Store a parsed test data file in its binary cache.
+
+    Only data frames whose columns share one numeric or boolean data
+    type are cached, the raw data is stored as a single column-major
+    array that must be memory-mappable.
+
+    """
+
+    if len(set(data.dtypes)) != 1 or data.dtypes.iloc[0].kind not in 'biuf':
+        return
+
+    index = np.asarray(data.index)
+    if index.dtype == object:
+        index = index.astype(str)
+
+    header = {
+        'options': repr(sorted(kwargs.items())),
+        'name': data.index.name,
+        'columns': list(data.columns),
+        # Units are stored as parts, prefixed symbols can be ambiguous.
+        'units': [list(data.units[key].parts) for key in data.columns],
+        'metadata': {
+            section: {key: _encode_info(info) for key, info in meta.items()}
+            for section, meta in data.metadata.items()
+        },
+    }
+
+    try:
+        save_cache(filepath, header, data.values, index)
+    except (IOError, OSError) as err:
+        msg = 'could not cache {0}: {1!r}'.format(filepath, err)
+        warnings.warn(msg, RuntimeWarning)
+
+
+def _encode_info(info):
+    """Encode metadata info as a JSON serializable list."""
+
+    is_unit = isinstance(info.unit, Unit)
+    unit = list(info.unit.parts) if is_unit else info.unit
+
+    return [info.value, unit, is_unit]
+
+
+def read_iter(filepath, chunksize=10000, components=None, fluids=None,
+              locations=None, types=None, **kwargs):
+    """Read experimental data in chunks of rows.
+
+    The header is parsed once and the raw data is then read lazily, so
+    files larger than the available memory can be processed.
+
+    Parameters
+    ----------
+    filepath : string
+        test data file path
+    chunksize : int, optional
+        number of raw data rows in each chunk
+    components, fluids, locations, types : [string], optional
+        label facet filter selecting the columns to read, see read_
+
+    Yields
+    ------
+    chunk : pandas DataFrame
+        consecutive raw data rows with the same column units,
+        descriptions and metadata properties as the DataFrame read_
+        returns
+
+    """
+
+    with open(filepath, 'r') as f:
+        metadata = parse_metadata(f)
+        column_names, column_units, time_format = parse_column_metadata(f)
+        column_units, csv_kwargs = _select_columns(
+            column_names, column_units,
+            _facet_filter(components, fluids, locations, types)
+        )
+        reader = pd.read_csv(f, chunksize=chunksize,
+                             **dict(kwargs, **csv_kwargs))
+        for chunk in reader:
+            chunk = _parse_time_index(chunk, time_format)
+            chunk = append_column_metadata(chunk, column_units)
+            yield append_metadata(chunk, metadata)
+
+
+def read_follow(filepath, interval=1.0, max_rows=10000, timeout=None,
+                components=None, fluids=None, locations=None, types=None,
+                **kwargs):
+    """Follow a test data file while it is being written.
+
+    The header and column rows are parsed once they are complete, then
+    the file is polled for appended raw data rows, which are parsed in
+    batches as they arrive.  Only complete, newline terminated rows are
+    parsed, a row still being written is kept until its remainder
+    arrives.
+
+    Parameters
+    ----------
+    filepath : string
+        test data file path
+    interval : float, optional
+        seconds to wait between polls when no new row was written
+    max_rows : int, optional
+        maximum number of rows in each batch, rows beyond it are left
+        in the file until the next batch is requested, so a slow
+        consumer never has more than max_rows rows held in memory
+    timeout : float, optional
+        stop after this many seconds without a new row, follow the file
+        indefinitely if None
+    components, fluids, locations, types : [string], optional
+        label facet filter selecting the columns to read, see read_
+    **kwargs
+        keyword arguments passed on to pandas.read_csv
+
+    Yields
+    ------
+    batch : pandas DataFrame
+        newly written raw data rows with the same column units,
+        descriptions and metadata properties as the DataFrame read_
+        returns
+
+    Examples
+    --------
+    Read the rows of a finished file in batches and stop:
+
+    >>> batches = read_follow('test_data/test_001.htf', max_rows=8,
+    ...                       timeout=0)
+    >>> [len(batch) for batch in batches]
+    [8, 8, 4]
+
+    """
+
+    with open(filepath, 'r') as f:
+        header, partial, remaining = [], '', None
+        idle = 0.0
+        while remaining != 0:
+            lines, partial = _read_lines(f, partial, 1)
+            if lines:
+                idle = 0.0
+                header.extend(lines)
+                if remaining is not None:
+                    remaining -= 1
+                elif _is_raw_data_section(lines[0]):
+                    # followed by the column label and unit rows
+                    remaining = 2
+                continue
+            elif timeout is not None and idle >= timeout:
+                return
+            time.sleep(interval)
+            idle += interval
+
+        handle = StringIO(''.join(header))
+        metadata = parse_metadata(handle)
+        column_names, column_units, time_format = \
+            parse_column_metadata(handle)
+        column_units, csv_kwargs = _select_columns(
+            column_names, column_units,
+            _facet_filter(components, fluids, locations, types)
+        )
+        csv_kwargs = dict(kwargs, **csv_kwargs)
+
+        idle = 0.0
+        while True:
+            rows, partial = _read_lines(f, partial, max_rows)
+            if rows:
+                idle = 0.0
+                batch = pd.read_csv(StringIO(''.join(rows)), **csv_kwargs)
+                if len(batch):
+                    batch = _parse_time_index(batch, time_format)
+                    batch = append_column_metadata(batch, column_units)
+                    yield append_metadata(batch, metadata)
+                continue
+            elif timeout is not None and idle >= timeout:
+                return
+            time.sleep(interval)
+            idle += interval
+
+
+def _is_raw_data_section(line):
+    """Check whether a header line starts the raw data section."""
+
+    match = _SECTION_RE.match(line.strip())
+
+    return match is not None and match.group('section') == 'raw data'
+
+
+def _read_lines(handle, partial, limit):
+    """Read complete lines appended to a file.
+
+    Parameters
+    ----------
+    handle : file handle
+    partial : string
+        start of a line read before without its newline
+    limit : int
+        maximum number of lines to read
+
+    Returns
+    -------
+    lines : [string]
+        newline terminated lines
+    partial : string
+        unterminated start of the next line
+
+    """
+
+    lines = []
+    while len(lines) < limit:
+        line = handle.readline()
+        if not line:
+            break
+        line, partial = partial + line, ''
+        if not line.endswith('\n'):
+            partial = line
+            break
+        lines.append(line)
+
+    return lines, partial
+
+
+def parse_metadata(handle, until='raw data'):
     """Parse test data file header metadata.
 
+    The header is scanned line by line up to the raw data section, so
+    the handle is left at the start of the raw data.  Blank lines are
+    skipped.
+
     Parameters
     ----------
     handle : test data file handle
+    until : string or None, optional
+        section ending the header, the whole file is parsed if None,
+        e.g. for sidecar files
 
     Returns
     -------
     metadata : dict
         parsed metadata dictionary describing test procedure
 
-    """
+    Raises
+    ------
+    MetadataError
+        if a header line is neither a section nor a key = value entry,
+        an entry precedes the first section, or the file ends before
+        the until section
+
+    Examples
+    --------
+    >>> from io import StringIO
+    >>> header = StringIO(u'[test conditions]\\nRH = 0.5 [-]\\n[raw data]\\n')
+    >>> parse_metadata(header)['test_conditions']['RH'].value
+    0.5
+
+    >>> bad = StringIO(u'[test info]\\ntester\\n')
+    >>> parse_metadata(bad)  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    ...
+    MetadataError: line 2: expected [section] or key = value, got 'tester'
 
-    MetadataInfo = namedtuple('MetadataInfo', ['value', 'unit'])
+    """
 
-    metadata = {}
-    while True:
-        line = handle.readline().strip()
-        if line.startswith('[raw data]'):
-            return metadata
-        elif line.startswith('[') and line.endswith(']'):
-            section = cleanse_names(line.strip().strip('[]'))
+    metadata, section = {}, None
+    for lineno, line in enumerate(iter(handle.readline, ''), 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        match = _SECTION_RE.match(line)
+        if match:
+            if match.group('section') == until:
+                return metadata
+            section = cleanse_names(match.group('section'))
             metadata[section] = {}
-        else:
-            key, info = [item.strip() for item in line.split('=')]
-            key = cleanse_names(key)
-            value, unit = parse_metadata_info(info)
-            metadata[section][key] = MetadataInfo(*parse_metadata_info(info))
+            continue
+
+        match = _ENTRY_RE.match(line)
+        if not match:
+            msg = 'expected [section] or key = value, got {0!r}'
+            raise MetadataError(msg.format(line), lineno)
+        elif section is None:
+            msg = 'entry {0!r} precedes the first [section]'
+            raise MetadataError(msg.format(line), lineno)
+
+        key = cleanse_names(match.group('key'))
+        metadata[section][key] = MetadataInfo(
+            *_parse_info(match.group('value'), match.group('unit'))
+        )
+
+    if until is None:
+        return metadata
+
+    msg = 'no [{0}] section before the end of the file'
+    raise MetadataError(msg.format(until))
 
 
 def parse_metadata_info(info):
@@ -117,37 +1108,76 @@ def parse_metadata_info(info):
     Parameters
     ----------
     info : string
+        metadata entry value with an optional trailing [unit]
 
     Returns
     -------
-    value : float
-    unit : string
+    value : bool, int, float or string
+    unit : Unit, string or None
+        Unit of numeric values with a known unit, the unit string
+        otherwise
+
+    Examples
+    --------
+    >>> parse_metadata_info('35.90 [degC]')
+    (35.9, Temperature Unit: degrees Celsius [\u00b0C])
+
+    >>> parse_metadata_info('-2 [degF]')
+    (-2, Temperature Unit: degrees Fahrenheit [\u00b0F])
+
+    >>> parse_metadata_info('true [bool]')
+    (True, 'bool')
+
+    >>> parse_metadata_info('Andrew Hjortland')
+    ('Andrew Hjortland', None)
 
     """
-    value, _, unit = [item.strip() for item in info.partition('[')]
-    unit = unit.strip('[]') if unit else None
 
-    # TODO Not happy with this code, don't like logic trees in general.
-    # Also, I think there is many oppurtunities for Exceptions, should
-    # make this more robust.
-    if unit:
-        if casefold(unit) == 'bool':
-            value = True if casefold(value) == 'true' else False
-        elif value.isdigit():
-            value = int(value)
-        elif isdecimal(value.replace('.', '')):
-            unit = Unit(unit)
-            value = float(value)
+    match = _INFO_RE.match(info.strip())
+
+    return _parse_info(match.group('value'), match.group('unit'))
+
+
+def _parse_info(value, unit):
+    """Convert a metadata value string according to its unit string."""
+
+    if unit is None:
+        return value, None
+
+    unit = unit.strip()
+    if not unit:
+        # An empty unit names no unit to convert the value with.
+        return value, unit
+    if casefold(unit) == 'bool':
+        return casefold(value) == 'true', unit
+
+    if _INT_RE.match(value):
+        value = int(value)
+    elif _FLOAT_RE.match(value):
+        value = float(value)
+    else:
+        return value, unit
+
+    try:
+        unit = get_unit(unit)
+    except Exception:
+        # Units missing from the library are kept as plain strings.
+        pass
 
     return value, unit
 
 
-def parse_raw_data(handle, **kwargs):
+def parse_raw_data(handle, components=None, fluids=None, locations=None,
+                   types=None, **kwargs):
     """Parse raw data from test output data file.
 
     Parameters
     ----------
     handle : test data file handle
+    components, fluids, locations, types : [string], optional
+        Only parse the columns whose measurement label has one of the
+        given component, fluid, location and type abbreviations, the
+        other columns are skipped by the CSV parser.
 
     Returns
     -------
@@ -155,21 +1185,184 @@ def parse_raw_data(handle, **kwargs):
 
     """
 
-    read_col_metadata = lambda line: line.strip().split(',')[1:]
+    column_names, column_units, time_format = parse_column_metadata(handle)
+    column_units, csv_kwargs = _select_columns(
+        column_names, column_units,
+        _facet_filter(components, fluids, locations, types)
+    )
+    result = pd.read_csv(handle, **dict(kwargs, **csv_kwargs))
+    result = _parse_time_index(result, time_format)
+
+    return append_column_metadata(result, column_units)
+
+
+def _facet_filter(components=None, fluids=None, locations=None, types=None):
+    """Return the label facets to filter columns by, keyed by facet."""
+
+    facets = {
+        'component': components,
+        'fluid': fluids,
+        'location': locations,
+        'type': types,
+    }
+
+    return {facet: value for facet, value in facets.items()
+            if value is not None}
+
+
+def _facet_kwargs(facets):
+    """Return the parse_raw_data keyword arguments of a facet filter."""
+
+    names = {'component': 'components', 'fluid': 'fluids',
+             'location': 'locations', 'type': 'types'}
+
+    return {names[facet]: value for facet, value in facets.items()}
+
+
+def _select_columns(column_names, column_units, facets):
+    """Build the CSV parser arguments reading the selected columns.
+
+    Parameters
+    ----------
+    column_names : [string]
+        cleansed column labels of the raw data section
+    column_units : [string]
+        column unit strings of the raw data section
+    facets : dict
+        label facet filter, all columns are read if empty
+
+    Returns
+    -------
+    column_units : [string]
+        unit strings of the selected columns
+    csv_kwargs : dict
+        pandas.read_csv arguments naming and selecting the columns
+
+    """
+
+    if not facets:
+        return column_units, {'names': column_names}
+
+    keep = set(LabelIndex(column_names).query(**facets))
+    positions = [ind for ind, key in enumerate(column_names) if key in keep]
+
+    # The first, unlabeled raw data column holds the row labels.
+    csv_kwargs = {
+        'header': None,
+        'names': [''] + [column_names[ind] for ind in positions],
+        'usecols': [0] + [ind + 1 for ind in positions],
+        'index_col': 0,
+    }
+
+    return [column_units[ind] for ind in positions], csv_kwargs
+
+
+def parse_column_metadata(handle):
+    """Parse the column label and unit rows of the raw data section.
+
+    Parameters
+    ----------
+    handle : test data file handle
+        positioned at the start of the raw data section, i.e. after
+        parse_metadata
+
+    Returns
+    -------
+    column_names : [string]
+        cleansed column labels
+    column_units : [string]
+        column unit strings
+    time_format : string or None
+        strptime format of the row labels declared in the first cell of
+        the unit row, None if the row labels are not timestamps
+
+    """
+
+    read_col_metadata = lambda line: line.strip().split(',')
 
-    column_names = cleanse_names(read_col_metadata(handle.readline()))
+    column_names = cleanse_names(read_col_metadata(handle.readline())[1:])
     column_units = read_col_metadata(handle.readline())
-    result = pd.read_csv(handle, names=column_names, **kwargs)
+
+    return column_names, column_units[1:], parse_time_format(column_units[0])
+
+
+def parse_time_format(spec):
+    """Translate a raw data time format specification to strptime.
+
+    Parameters
+    ----------
+    spec : string
+        time format declared in the unit row of the raw data section,
+        built from the yyyy, mm, dd, HH, MM and SS fields
+
+    Returns
+    -------
+    result : string or None
+        strptime format, None if spec is not a time format
+
+    Examples
+    --------
+    >>> parse_time_format('yyyy-mm-dd HH:MM:SS')
+    '%Y-%m-%d %H:%M:%S'
+
+    >>> parse_time_format('mm') is None
+    True
+
+    """
+
+    spec = spec.strip()
+    if not _TIME_SPEC_RE.match(spec) or \
+            len(_TIME_FIELD_RE.findall(spec)) < 2:
+        return None
+
+    fields = dict(TIME_FIELDS)
+
+    return _TIME_FIELD_RE.sub(lambda match: fields[match.group()], spec)
+
+
+def _parse_time_index(data, time_format):
+    """Parse the row labels of raw data with a fixed time format.
+
+    The labels are converted in one vectorized pass into a
+    DatetimeIndex, and left as parsed if time_format is None.
+
+    """
+
+    if time_format is not None:
+        data.index = pd.to_datetime(data.index, format=time_format)
+    data.index.name = None
+
+    return data
+
+
+def append_column_metadata(data, column_units):
+    """Append unit and description properties to the data columns.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        raw measurement DataFrame
+    column_units : [string or (string, string)]
+        unit strings or Unit.parts pairs in the same order as the
+        DataFrame columns
+
+    Returns
+    -------
+    result : pandas DataFrame
+        measurement DataFrame with a unit and description property on
+        each column, a units dictionary property and a label_index
+        property to look up columns by label facet
+
+    """
 
     # TODO It would be cool if key-unit pairs were methods that updated
     # with each call.
-    for key, unit in zip(result.keys(), column_units):
-        result[key].unit = Unit(unit)
-    result.units = {key: result[key].unit for key in result.keys()}
+    for key, unit in zip(data.keys(), column_units):
+        data[key].unit = get_unit(unit)
+    data.units = {key: data[key].unit for key in data.keys()}
+    data = index_labels(data)
 
-    result = translate_keys(result, result.keys())
-
-    return result
+    return translate_keys(data, data.keys())
 
 
 def cleanse_names(names, bad_chars=[], repl='_'):
@@ -205,19 +1398,57 @@ def cleanse_names(names, bad_chars=[], repl='_'):
     >>> cleanse_names('abcdef')
     'abcdef'
 
-    """
+    Leading characters that cannot start an identifier are dropped if
+    the replacement is empty:
 
-    clean = lambda x, y: x + y if isidentifier(x + y) else x + repl
+    >>> cleanse_names('12 a-b', repl='')
+    'ab'
+
+    """
 
-    result = ''
     if isinstance(names, str):
-        for char in names:
-            result = clean(result, char)
+        return _cleanse_name(names, repl)
+
+    return [_cleanse_name(name, repl) for name in names]
+
+
+def _cleanse_name(name, repl):
+    """Cleanse a single name, memoized by name and replacement."""
+
+    if _IDENTIFIER_RE.match(name):
+        return name
+
+    key = (name, repl)
+    result = _NAME_CACHE.get(key)
+    if result is not None:
+        return result
+
+    if not _ASCII_RE.match(name) or \
+            not (repl == '' or _IDENTIFIER_RE.match(repl)):
+        result = _legacy_cleanse_name(name, repl)
+    elif repl:
+        result = _BAD_CHAR_RE.sub(repl, _LEADING_DIGIT_RE.sub(repl, name))
     else:
-        result = [result] * len(names)
-        for ind, name in enumerate(names):
-            for char in name:
-                result[ind] = clean(result[ind], char)
+        result = _BAD_CHAR_RE.sub('', _BAD_START_RE.sub('', name))
+    _NAME_CACHE[key] = result
+
+    return result
+
+
+def _legacy_cleanse_name(name, repl):
+    """Cleanse a name one character at a time.
+
+    Each character is kept if the name built so far remains a valid
+    identifier, and replaced otherwise.  Used for names and
+    replacements outside the ASCII identifier alphabet the patterns of
+    _cleanse_name cover.
+
+    """
+
+    result = ''
+    for char in name:
+        result = result + char if isidentifier(result + char) else \
+            result + repl
 
     return result
 
@@ -235,7 +1466,9 @@ def append_metadata(data, metadata):
     Returns
     -------
     result : pandas DataFrame
-        measurement DataFrame containing additional metadata properties.
+        measurement DataFrame containing additional metadata properties,
+        and the column uncertainties declared in an [uncertainty]
+        section, see uncertainty.append_uncertainty
 
     """
 
@@ -246,10 +1479,116 @@ def append_metadata(data, metadata):
         )
         for key, info in meta.items():
             data.__dict__[section][key].unit = info.unit
+    if UNCERTAINTY_SECTION in metadata:
+        data = append_uncertainty(data, metadata[UNCERTAINTY_SECTION])
 
     return data
 
 
 def get_units(frame):
     return {key: frame[key].unit if hasattr(frame[key], 'unit')
-            else Unit() for key in frame.keys()}
+            else get_unit() for key in frame.keys()}
+
+
+def to_base_units(frame):
+    """Convert every column of a measurement DataFrame to its base unit.
+
+    Parameters
+    ----------
+    frame : pandas DataFrame
+        measurement DataFrame with per-column unit properties, usually
+        returned by read_
+
+    Returns
+    -------
+    result : pandas DataFrame
+        copy of the DataFrame with the values, column units and units
+        property converted to the base units, i.e. kelvin, pascal
+
+    """
+
+    return _convert_frame(frame, lambda unit: unit.base)
+
+
+def to_unit_system(frame, system='SI'):
+    """Convert every column of a measurement DataFrame to a unit system.
+
+    Parameters
+    ----------
+    frame : pandas DataFrame
+        measurement DataFrame with per-column unit properties, usually
+        returned by read_
+    system : str, optional
+        name of the target unit system, a key of unit.UNIT_SYSTEMS such
+        as 'SI' or 'IP'
+
+    Returns
+    -------
+    result : pandas DataFrame
+        copy of the DataFrame with the values, column units and units
+        property converted to the unit system, columns of quantities
+        the system does not define are left unchanged
+
+    """
+
+    try:
+        targets = UNIT_SYSTEMS[system]
+    except KeyError:
+        msg = 'unknown unit system {0!r}, expected one of {1}'
+        raise ValueError(msg.format(system, sorted(UNIT_SYSTEMS)))
+
+    return _convert_frame(frame, lambda unit: targets.get(unit.quantity))
+
+
+def _convert_frame(frame, target):
+    """Convert the columns of a DataFrame to the units given by target.
+
+    Columns sharing the same conversion are converted together as one
+    two-dimensional block.
+
+    Parameters
+    ----------
+    frame : pandas DataFrame
+        measurement DataFrame with per-column unit properties
+    target : func
+        function returning the target unit string of a column Unit, or
+        None to leave the column unchanged
+
+    Returns
+    -------
+    result : pandas DataFrame
+
+    """
+
+    units = get_units(frame)
+    groups = {}
+    for key, unit in units.items():
+        new = target(unit) if unit.quantity else None
+        if not new:
+            continue
+        units[key] = get_unit(new)
+        conversion = convert(unit, units[key])
+        if conversion.scale is None:
+            group = conversion
+        elif (conversion.scale, conversion.offset) == (1, 0):
+            continue
+        else:
+            group = conversion.scale, conversion.offset
+        groups.setdefault(group, (conversion, []))[1].append(key)
+
+    # DataFrame.copy() drops the item cache holding the column unit
+    # properties of the source frame, the constructor leaves it alone.
+    result = pd.DataFrame(frame, copy=True)
+    for conversion, keys in groups.values():
+        block = np.array(frame[keys].values, dtype=float)
+        result[keys] = conversion(block, inplace=True)
+
+    for key, unit in units.items():
+        result[key].unit = unit
+        if hasattr(frame[key], 'description'):
+            result[key].description = frame[key].description
+    result.units = units
+    if 'metadata' in frame.__dict__:
+        result = append_metadata(result, frame.metadata)
+
+    return result
@@ -1,8 +1,11 @@
 """Utility functions used for working with sensor measurment data."""
 
+from collections import namedtuple
 from os import path
+import re
 
 from compat import PY3
+from util import LRUCache
 
 if PY3:
     from configparser import SafeConfigParser
@@ -10,6 +13,33 @@ else:
     from ConfigParser import SafeConfigParser
 
 
+DEFAULTS_PATH = path.join(path.dirname(path.abspath(__file__)), 'defaults.ini')
+SECTIONS = ('components', 'fluids', 'locations', 'measurement types')
+
+_TRANSLATOR = None
+
+LabelInfo = namedtuple('LabelInfo', [
+    'label', 'component', 'fluid', 'location', 'type', 'component_id',
+    'fluid_id', 'location_id', 'type_id', 'differential', 'reference'
+])
+
+LABEL_FACETS = ('component', 'fluid', 'location', 'type', 'component_id',
+                'fluid_id', 'location_id', 'type_id', 'differential')
+
+# {first}{Second?}{#?}, the second part of a differential starts with a
+# capital letter.
+_PART_RE = re.compile(
+    r'^(?P<first>[A-Za-z][a-z0-9]*?)(?P<second>[A-Z][a-zA-Z0-9]*?)?'
+    r'(?P<number>\d*)$'
+)
+_TYPE_RE = re.compile(
+    r'^(?P<delta>Delta)?(?P<type>[A-Za-z]+?)(?P<number>\d*)$'
+)
+_CAPITAL_RE = re.compile(r'(?<=.)(?=[A-Z])')
+
+_LABEL_CACHE = LRUCache(4096)
+
+
 def load_library(filepath):
     """Load sensor label configuration file.
 
@@ -26,17 +56,87 @@ def load_library(filepath):
     parser = SafeConfigParser()
     parser.read(filepath)
 
-    sections = ['components', 'fluids', 'locations', 'measurement types']
-
-    missing = set(sections) - set(parser.sections())
+    missing = set(SECTIONS) - set(parser.sections())
 
     if missing:
-        print('Found sections: ', sorted(parser.section()))
+        print('Found sections: ', sorted(parser.sections()))
         print('Missing sections: ', sorted(missing))
 
     return parser
 
 
+class LabelTranslator(object):
+
+    """Sensor label translator with memoized translations.
+
+    The label library sections are flattened into plain dictionaries
+    once, and the description of each label is cached after its first
+    translation.
+
+    Parameters
+    ----------
+    library : SafeConfigParser
+        Sensor label translator dictionary for components, fluids,
+        locations, and measurement types parts of the sensor
+        measurement label.
+    maxsize : int, optional
+        Maximum number of label translations kept in the cache.
+
+    """
+
+    def __init__(self, library, maxsize=4096):
+        self._optionxform = library.optionxform
+        self._sections = tuple(
+            dict(library.items(sec)) if library.has_section(sec) else {}
+            for sec in SECTIONS
+        )
+        self._cache = LRUCache(maxsize)
+
+    def translate(self, label, sep='_'):
+        """Translate a sensor measurement label to pretty description.
+
+        Abbreviations missing from the library are kept as they are.
+
+        """
+
+        description = self._cache.get((label, sep))
+        if description is None:
+            description = ' '.join([
+                table.get(self._optionxform(abrv), abrv)
+                for table, abrv in zip(self._sections, label.split(sep))
+            ])
+            self._cache[(label, sep)] = description
+
+        return description
+
+    def is_known(self, section, abrv):
+        """Check whether an abbreviation is defined in a library section."""
+
+        table = self._sections[SECTIONS.index(section)]
+
+        return self._optionxform(abrv) in table
+
+
+def get_translator():
+    """Return the label translator of the package default library.
+
+    The defaults.ini library shipped with the package is parsed on the
+    first call only.
+
+    Returns
+    -------
+    translator : LabelTranslator
+
+    """
+
+    global _TRANSLATOR
+
+    if _TRANSLATOR is None:
+        _TRANSLATOR = LabelTranslator(load_library(DEFAULTS_PATH))
+
+    return _TRANSLATOR
+
+
 def translate_label(label, library=None, sep='_'):
     """Translate a sensor measurement label to pretty description.
 
@@ -45,10 +145,10 @@ def translate_label(label, library=None, sep='_'):
     label : string
         Measurement label string formatted using the Herrick
         Psychrometric Chamber Experimental Data Standard
-    library : SafeConfigParser
+    library : SafeConfigParser or LabelTranslator, optional
         Sensor label translator dictionary for components, fluids,
         locations, and measurement types parts of the sensor
-        measurement label.
+        measurement label, the package defaults.ini library if None.
     sep : string, optional, default '_'
         Separator character used in measurement label, optional
         parameter should only be used in special cases when default
@@ -71,15 +171,13 @@ def translate_label(label, library=None, sep='_'):
     """
 
     if not library:
-        library = load_library(path.abspath('./defaults.ini'))
-
-    SECTIONS = ('components', 'fluids', 'locations', 'measurement types')
+        translator = get_translator()
+    elif isinstance(library, LabelTranslator):
+        translator = library
+    else:
+        translator = LabelTranslator(library)
 
-    description = ' '.join([
-        library.get(sec, abrv) for sec, abrv in zip(SECTIONS, label.split(sep))
-    ])
-
-    return description
+    return translator.translate(label, sep)
 
 
 def translate_keys(df, keys=None):
@@ -91,9 +189,9 @@ def translate_keys(df, keys=None):
         data frame object containing measurement data with keys
         formatted using the Herrick Pyschrometric Chamber Experimental
         Data Standard.
-    keys : [string]
+    keys : [string], optional
         list of label strings contained in the measurement data frame
-        translated into descriptions.
+        translated into descriptions, all keys if None.
 
     Returns
     -------
@@ -103,7 +201,238 @@ def translate_keys(df, keys=None):
 
     """
 
-    for key in keys:
-        df[key].description = translate_label(key)
+    translator = get_translator()
+    for key in df.keys() if keys is None else keys:
+        df[key].description = translator.translate(key)
+
+    return df
+
+
+def parse_label(label, sep='_'):
+    """Parse a sensor measurement label into its parts.
+
+    Labels follow the {COMPONENT}{#?}_{FLUID}{#?}_{LOCATION}{#?}_{TYPE}
+    convention, each part of a differential measurement label can name
+    a second component, fluid or location starting with a capital letter
+    and the type is prefixed with Delta.
+
+    Parameters
+    ----------
+    label : string
+        Measurement label string formatted using the Herrick
+        Psychrometric Chamber Experimental Data Standard
+    sep : string, optional, default '_'
+        Separator character used in measurement label.
+
+    Returns
+    -------
+    info : LabelInfo or None
+        component, fluid, location and type abbreviations, their
+        numeric identifiers or None, whether the label is a differential
+        measurement and the (component, fluid, location, type) reference
+        of a differential measurement, whose items are None where the
+        part is shared. None if the label does not follow the
+        convention.
+
+    Examples
+    --------
+    >>> info = parse_label('comp2_ref_in_T')
+    >>> info.component, info.component_id, info.type, info.differential
+    ('comp', 2, 'T', False)
+
+    >>> parse_label('idhxComp_ref_outIn_DeltaT').reference
+    ('comp', None, 'in', None)
+
+    >>> parse_label('tester') is None
+    True
+
+    """
+
+    info = _LABEL_CACHE.get((label, sep))
+    if info is None and (label, sep) not in _LABEL_CACHE:
+        info = _parse_label(label, sep, get_translator())
+        _LABEL_CACHE[(label, sep)] = info
+
+    return info
+
+
+def _parse_label(label, sep, translator):
+    """Parse a sensor measurement label, see parse_label."""
+
+    parts = label.split(sep)
+    if len(parts) != 4:
+        return None
+
+    result, reference = [], []
+    for section, part in zip(SECTIONS[:3], parts[:3]):
+        match = _PART_RE.match(part)
+        if not match:
+            return None
+        first, second, number = match.group('first', 'second', 'number')
+        # Keep trailing digits that belong to an abbreviation, i.e. h2o
+        if number and not second and translator.is_known(section, part):
+            first, number = part, ''
+        result.append((first, int(number) if number else None))
+        reference.append(second[:1].lower() + second[1:] if second else None)
+
+    match = _TYPE_RE.match(parts[3])
+    if not match:
+        return None
+    delta, type_, number = match.group('delta', 'type', 'number')
+    second = None
+    if delta and not translator.is_known(SECTIONS[3], type_):
+        for split in _CAPITAL_RE.finditer(type_):
+            head, tail = type_[:split.start()], type_[split.start():]
+            if translator.is_known(SECTIONS[3], head) and \
+                    translator.is_known(SECTIONS[3], tail):
+                type_, second = head, tail
+                break
+    reference.append(second)
+    differential = bool(delta) or any(reference)
+
+    (component, component_id), (fluid, fluid_id), (location, location_id) = \
+        result
+
+    return LabelInfo(
+        label=label, component=component, fluid=fluid, location=location,
+        type=type_, component_id=component_id, fluid_id=fluid_id,
+        location_id=location_id, type_id=int(number) if number else None,
+        differential=differential, reference=tuple(reference)
+    )
+
+
+class LabelIndex(object):
+
+    """Inverted index of measurement labels by label facet.
+
+    A differential label is indexed as two members, one per measured
+    point, the second taking the parts the label shares with the first.
+    A query matches a differential label when all its facets match one
+    of the members.
+
+    Parameters
+    ----------
+    labels : [string]
+        measurement labels to index, labels that do not follow the
+        labeling convention are left out
+    sep : string, optional, default '_'
+        Separator character used in measurement labels.
+
+    Examples
+    --------
+    >>> index = LabelIndex(['comp_ref_in_T', 'comp_ref_in_pa',
+    ...                     'comp_ref_out_T', 'idhxComp_ref_outIn_DeltaT'])
+    >>> index.query(component='comp', fluid='ref', location='in', type='T')
+    ['comp_ref_in_T', 'idhxComp_ref_outIn_DeltaT']
+
+    >>> index.query(type=['T', 'pa'], location='in', differential=False)
+    ['comp_ref_in_T', 'comp_ref_in_pa']
+
+    The compressor side of the differential is at the inlet only:
+
+    >>> index.query(component='comp', location='out')
+    ['comp_ref_out_T']
+
+    """
+
+    def __init__(self, labels, sep='_'):
+        self.labels = []
+        self.info = {}
+        self._index = {facet: {} for facet in LABEL_FACETS}
+        # Position of the label of each indexed member
+        self._owners = []
+
+        for label in labels:
+            info = parse_label(label, sep)
+            if info is None:
+                continue
+            self.info[label] = info
+            for member in _members(info):
+                for facet, value in zip(LABEL_FACETS, member):
+                    self._index[facet].setdefault(value, set()).add(
+                        len(self._owners))
+                self._owners.append(len(self.labels))
+            self.labels.append(label)
+
+    def query(self, **facets):
+        """Return the labels matching every given facet.
+
+        Parameters
+        ----------
+        facets : string, int, bool or list
+            facet values keyed by facet name, one of LABEL_FACETS, a
+            list matches any of its values and None matches everything
+
+        Returns
+        -------
+        labels : [string]
+            matching labels in the order they were indexed
+
+        """
+
+        result = None
+        for facet, wanted in facets.items():
+            if facet not in self._index:
+                raise TypeError('unknown label facet {0!r}'.format(facet))
+            if wanted is None:
+                continue
+            if not isinstance(wanted, (list, tuple, set, frozenset)):
+                wanted = [wanted]
+            index = self._index[facet]
+            matches = set().union(*[index.get(value, ()) for value in wanted])
+            result = matches if result is None else result & matches
+
+        if result is None:
+            return list(self.labels)
+
+        positions = sorted(set(self._owners[member] for member in result))
+
+        return [self.labels[pos] for pos in positions]
+
+
+def _members(info):
+    """Return the facet values of the measured points of a label.
+
+    A differential label has a second member, which takes the parts of
+    its reference and the first member's parts where they are shared.
+    Identifiers only carry over with shared parts.
+
+    """
+
+    first = tuple(getattr(info, facet) for facet in LABEL_FACETS)
+    if not any(info.reference):
+        return [first]
+
+    second = list(first)
+    for pos, value in enumerate(info.reference):
+        if value is not None:
+            second[pos] = value
+            if pos < 3:
+                second[LABEL_FACETS.index(LABEL_FACETS[pos] + '_id')] = None
+
+    return [first, tuple(second)]
+
+
+def index_labels(df, keys=None):
+    """Add an inverted label index to a data frame.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        data frame object containing measurement data with keys
+        formatted using the Herrick Pyschrometric Chamber Experimental
+        Data Standard.
+    keys : [string], optional
+        list of label strings to index, all keys if None.
+
+    Returns
+    -------
+    df : pandas DataFrame
+        data frame object updated with a new 'label_index' property
+        holding a LabelIndex of the keys.
+
+    """
+
+    df.label_index = LabelIndex(df.keys() if keys is None else keys)
 
     return df
@@ -0,0 +1,346 @@
+"""Moist air psychrometric properties.
+
+Properties follow the ASHRAE Handbook of Fundamentals formulation with
+the Hyland-Wexler saturation pressure of water vapor over ice and
+liquid water.  Every function works on whole NumPy arrays or pandas
+Series at once.  Series with a unit property, such as the columns
+returned by read_, are converted to the units the formulas use, other
+inputs are taken to be in degrees Celsius, kilopascals and fractions.
+
+"""
+import numpy as np
+import pandas as pd
+
+from unit import get_unit, normalize, series_like
+
+
+# Standard atmospheric pressure, kPa
+P_ATM = 101.325
+# Ratio of the molar masses of water vapor and dry air
+MOLAR_MASS_RATIO = 0.621945
+# Specific gas constant of dry air, kJ/(kg K)
+R_AIR = 0.287042
+
+# Hyland-Wexler coefficients of ln(pws / Pa) over ice and liquid water
+_ICE = (-5.6745359e3, 6.3925247, -9.6778430e-3, 6.2215701e-7,
+        2.0747825e-9, -9.4840240e-13, 4.1635019)
+_WATER = (-5.8002206e3, 1.3914993, -4.8640239e-2, 4.1764768e-5,
+          -1.4452093e-8, 0., 6.5459673)
+# Dew point approximation coefficients, ASHRAE Fundamentals eq. 39
+_DEW_POINT = (6.54, 14.526, 0.7389, 0.09486, 0.4569)
+
+
+def saturation_pressure(T):
+    """Return the saturation pressure of water vapor.
+
+    Parameters
+    ----------
+    T : array_like
+        temperature, degC, over ice below the triple point and over
+        liquid water above it
+
+    Returns
+    -------
+    pws : ndarray or pandas Series
+        saturation pressure, kPa
+
+    Examples
+    --------
+    >>> np.round(saturation_pressure(np.array([-20., 0.01, 25.])), 5)
+    array([0.10326, 0.61166, 3.16922])
+
+    """
+
+    t = normalize(T, 'temperature')
+    pws = np.exp(_ln_saturation_pressure(t + 273.15)[0]) / 1e3
+
+    return series_like(pws, T, 'kPa')
+
+
+def humidity_ratio(T, RH, p=P_ATM):
+    """Return the humidity ratio of moist air.
+
+    Parameters
+    ----------
+    T : array_like
+        dry bulb temperature, degC
+    RH : array_like
+        relative humidity, fraction
+    p : array_like, optional
+        total pressure, kPa
+
+    Returns
+    -------
+    W : ndarray or pandas Series
+        humidity ratio, kg water vapor per kg dry air
+
+    Examples
+    --------
+    >>> round(float(humidity_ratio(25., 0.5)), 6)
+    0.009881
+
+    """
+
+    t = normalize(T, 'temperature')
+    p = normalize(p, 'pressure')
+    pw = normalize(RH, 'dimensionless') * \
+        np.exp(_ln_saturation_pressure(t + 273.15)[0]) / 1e3
+
+    return series_like(MOLAR_MASS_RATIO * pw / (p - pw), T, '-')
+
+
+def enthalpy(T, W):
+    """Return the specific enthalpy of moist air.
+
+    Parameters
+    ----------
+    T : array_like
+        dry bulb temperature, degC
+    W : array_like
+        humidity ratio, kg/kg dry air
+
+    Returns
+    -------
+    h : ndarray or pandas Series
+        specific enthalpy, kJ per kg dry air
+
+    Examples
+    --------
+    >>> round(float(enthalpy(25., 0.009881)), 3)
+    50.322
+
+    """
+
+    t = normalize(T, 'temperature')
+    W = normalize(W, 'dimensionless')
+
+    return series_like(1.006 * t + W * (2501. + 1.86 * t), T)
+
+
+def density(T, W, p=P_ATM):
+    """Return the density of moist air.
+
+    Parameters
+    ----------
+    T : array_like
+        dry bulb temperature, degC
+    W : array_like
+        humidity ratio, kg/kg dry air
+    p : array_like, optional
+        total pressure, kPa
+
+    Returns
+    -------
+    rho : ndarray or pandas Series
+        density of the mixture, kg/m3
+
+    Examples
+    --------
+    >>> round(float(density(25., 0.009881)), 3)
+    1.177
+
+    """
+
+    t = normalize(T, 'temperature')
+    W = normalize(W, 'dimensionless')
+    p = normalize(p, 'pressure')
+    volume = R_AIR * (t + 273.15) * (1. + W / MOLAR_MASS_RATIO) / p
+
+    return series_like((1. + W) / volume, T)
+
+
+def dew_point(T, RH, iterations=3):
+    """Return the dew point temperature of moist air.
+
+    The saturation pressure is inverted by Newton iterations from the
+    ASHRAE dew point approximation, applied to all samples at once.
+
+    Parameters
+    ----------
+    T : array_like
+        dry bulb temperature, degC
+    RH : array_like
+        relative humidity, fraction
+    iterations : int, optional
+        number of Newton iterations
+
+    Returns
+    -------
+    Tdp : ndarray or pandas Series
+        dew point temperature, degC, over ice below the triple point
+
+    Examples
+    --------
+    >>> round(float(dew_point(25., 0.5)), 3)
+    13.864
+
+    """
+
+    t = normalize(T, 'temperature')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ln_pw = _ln_saturation_pressure(t + 273.15)[0] + \
+            np.log(normalize(RH, 'dimensionless'))
+
+    # Initial guess from the approximation in terms of pw in kPa
+    alpha = ln_pw - np.log(1e3)
+    c14, c15, c16, c17, c18 = _DEW_POINT
+    guess = c14 + c15 * alpha + c16 * alpha ** 2 + c17 * alpha ** 3 + \
+        c18 * np.exp(alpha) ** 0.1984
+    below = 6.09 + 12.608 * alpha + 0.4959 * alpha ** 2
+    td = np.where(guess < 0, below, guess) + 273.15
+
+    for _ in range(iterations):
+        value, slope = _ln_saturation_pressure(td)
+        td = td - (value - ln_pw) / slope
+
+    return series_like(td - 273.15, T, 'degC')
+
+
+def wet_bulb(T, RH, p=P_ATM, iterations=5):
+    """Return the thermodynamic wet bulb temperature of moist air.
+
+    The wet bulb temperature is bracketed by the dew point and the dry
+    bulb temperature and found by Newton iterations of all samples at
+    once, steps leaving the bracket are replaced by bisection.  Within
+    a few tenths of a degree of the triple point, where the saturation
+    pressure switches from ice to liquid water, either side may hold a
+    root, and one of them is returned.
+
+    Parameters
+    ----------
+    T : array_like
+        dry bulb temperature, degC
+    RH : array_like
+        relative humidity, fraction
+    p : array_like, optional
+        total pressure, kPa
+    iterations : int, optional
+        number of Newton iterations
+
+    Returns
+    -------
+    Twb : ndarray or pandas Series
+        wet bulb temperature, degC
+
+    Examples
+    --------
+    >>> round(float(wet_bulb(25., 0.5)), 3)
+    17.889
+
+    """
+
+    t = np.asarray(normalize(T, 'temperature'), dtype=float)
+    RH = normalize(RH, 'dimensionless')
+    p = normalize(p, 'pressure')
+    W = np.asarray(humidity_ratio(t, RH, p))
+    low = np.asarray(dew_point(t, RH))
+    high = t.copy()
+
+    guess = (low + high) / 2.
+    for _ in range(iterations):
+        residual, slope = _wet_bulb_residual(guess, t, W, p)
+        # The residual increases with the wet bulb temperature
+        high = np.where(residual > 0, guess, high)
+        low = np.where(residual > 0, low, guess)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            step = guess - residual / slope
+        guess = np.where((step >= low) & (step <= high), step,
+                         (low + high) / 2.)
+
+    return series_like(guess, T, 'degC')
+
+
+def _wet_bulb_residual(tw, t, W, p):
+    """Return the humidity ratio error of a wet bulb temperature guess.
+
+    The humidity ratio of air at dry bulb temperature t that saturates
+    adiabatically at tw, ASHRAE Fundamentals eq. 33 and 35, less the
+    actual humidity ratio W, and its derivative with respect to tw.
+
+    """
+
+    value, slope = _ln_saturation_pressure(tw + 273.15)
+    pws = np.exp(value) / 1e3
+    ws = MOLAR_MASS_RATIO * pws / (p - pws)
+    dws = MOLAR_MASS_RATIO * p * pws * slope / (p - pws) ** 2
+
+    # Over liquid water and over ice
+    water = tw >= 0
+    a0, a1 = np.where(water, 2501., 2830.), np.where(water, -2.326, -0.24)
+    b1 = np.where(water, -4.186, -2.1)
+    numerator = (a0 + a1 * tw) * ws - 1.006 * (t - tw)
+    denominator = a0 + 1.86 * t + b1 * tw
+    w = numerator / denominator
+    dw = (a1 * ws + (a0 + a1 * tw) * dws + 1.006 - w * b1) / denominator
+
+    return w - W, dw
+
+
+def moist_air_properties(T, RH, p=P_ATM):
+    """Return the psychrometric properties of moist air.
+
+    Parameters
+    ----------
+    T : array_like
+        dry bulb temperature, degC
+    RH : array_like
+        relative humidity, fraction
+    p : array_like, optional
+        total pressure, kPa
+
+    Returns
+    -------
+    result : pandas DataFrame
+        humidity ratio W, kg/kg dry air, specific enthalpy h, kJ/kg dry
+        air, dew point Tdp and wet bulb Twb temperatures, degC, and
+        density rho, kg/m3, indexed like T
+
+    Examples
+    --------
+    Properties of the indoor room air of a test:
+
+    >>> from io_ import read_
+    >>> data = read_('test_data/test_001.htf')
+    >>> air = data.test_conditions
+    >>> props = moist_air_properties(air['idrm_air_T'], air['idrm_air_RH'])
+    >>> props.round(4).values.tolist()
+    [[0.0241, 98.087, 28.0127, 29.7471, 1.1261]]
+
+    """
+
+    t = normalize(T, 'temperature')
+    RH = normalize(RH, 'dimensionless')
+    p = normalize(p, 'pressure')
+    W = humidity_ratio(t, RH, p)
+
+    result = pd.DataFrame({
+        'W': W,
+        'h': enthalpy(t, W),
+        'Tdp': dew_point(t, RH),
+        'Twb': wet_bulb(t, RH, p),
+        'rho': density(t, W, p),
+    }, index=getattr(T, 'index', None),
+        columns=['W', 'h', 'Tdp', 'Twb', 'rho'])
+    for key, unit in (('W', '-'), ('Tdp', 'degC'), ('Twb', 'degC')):
+        result[key].unit = get_unit(unit)
+
+    return result
+
+
+def _ln_saturation_pressure(T):
+    """Return ln(pws / Pa) and its derivative at absolute temperatures."""
+
+    ice = T < 273.16
+    if not np.any(ice):
+        c = _WATER
+    elif np.all(ice):
+        c = _ICE
+    else:
+        c = [np.where(ice, a, b) for a, b in zip(_ICE, _WATER)]
+    T2 = T * T
+    value = c[0] / T + c[1] + c[2] * T + c[3] * T2 + c[4] * T2 * T + \
+        c[5] * T2 * T2 + c[6] * np.log(T)
+    slope = -c[0] / T2 + c[2] + 2 * c[3] * T + 3 * c[4] * T2 + \
+        4 * c[5] * T2 * T + c[6] / T
+
+    return value, slope
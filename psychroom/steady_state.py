@@ -0,0 +1,515 @@
+"""Steady-state detection of experimental data."""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from label_handler import parse_label
+
+
+Criterion = namedtuple('Criterion', ['std', 'slope'])
+Criterion.__new__.__defaults__ = (None, None)
+
+SteadyStateInterval = namedtuple('SteadyStateInterval',
+                                 ['start', 'stop', 'samples'])
+
+# Number of samples between shifts of the running sums to a new origin,
+# in windows, keeping the sums close to the window sums they produce.
+REBASE_WINDOWS = 4
+
+
+class SteadyStateDetector(object):
+
+    """Incremental steady-state detector over chunks of measurement data.
+
+    A channel is steady at a sample if the standard deviation and the
+    least squares slope of its values over the window of samples ending
+    there are within the criterion of the channel.  The data is steady
+    where every channel is, and each run of consecutive steady windows
+    makes up a steady-state interval spanning from the first sample of
+    its first window to the last sample of its last window.
+
+    The window statistics are computed from running sums kept in a ring
+    buffer of one window, so each sample costs the same whatever the
+    window length and chunks of any size, down to single rows, may be
+    fed to update.
+
+    Parameters
+    ----------
+    window : int
+        number of samples in the moving window
+    criteria : {Criterion}
+        steady-state criteria keyed by column label or by label type,
+        e.g. 'T' for all temperatures, a column label takes precedence
+        over its type, columns without a criterion are ignored
+    period : float, optional
+        seconds between samples used to express slopes per second,
+        inferred from the first chunk if it has a DatetimeIndex, and
+        slopes are per sample otherwise
+
+    Attributes
+    ----------
+    channels : [string]
+        column labels checked, set by the first chunk
+    intervals : [SteadyStateInterval]
+        closed steady-state intervals found so far
+    steady : pandas Series
+        whether each sample of the last chunk ends a steady window
+
+    Examples
+    --------
+    >>> values = np.r_[np.linspace(0, 5, 50), np.full(50, 10.)]
+    >>> frame = pd.DataFrame({'comp_ref_in_T': values})
+    >>> detector = SteadyStateDetector(10, {'T': Criterion(std=0.1)})
+    >>> detector.update(frame)
+    []
+    >>> detector.flush()
+    [SteadyStateInterval(start=50, stop=99, samples=50)]
+
+    """
+
+    def __init__(self, window, criteria, period=None):
+        if window < 2:
+            raise ValueError('window must hold at least two samples')
+        self.window = window
+        self.criteria = criteria
+        self.period = period
+        self.channels = None
+        self.intervals = []
+        self.steady = None
+        self._times = []
+        self._count = 0
+        self._open = None
+
+    def update(self, chunk):
+        """Feed the next rows of measurement data to the detector.
+
+        Parameters
+        ----------
+        chunk : pandas DataFrame
+            measurement data following the previous chunk, e.g. from
+            read_iter or read_follow
+
+        Returns
+        -------
+        intervals : [SteadyStateInterval]
+            steady-state intervals closed by the chunk
+
+        """
+
+        if self.channels is None:
+            self._start(chunk)
+        if self.period is None and isinstance(chunk.index, pd.DatetimeIndex):
+            self._infer_period(chunk.index)
+
+        values = np.array(chunk[self.channels].values, dtype=float)
+        labels = np.asarray(chunk.index, dtype=object)
+        steady = np.zeros(len(values), dtype=bool)
+        closed = []
+        # Long chunks are processed in blocks between rebases
+        size = REBASE_WINDOWS * self.window
+        for pos in range(0, len(values), size):
+            block = slice(pos, pos + size)
+            std, slope = self._window_stats(values[block])
+            with np.errstate(invalid='ignore'):
+                steady[block] = np.all((std <= self._std) &
+                                       (np.abs(slope) <= self._slope),
+                                       axis=1)
+            closed.extend(self._find_intervals(steady[block], labels[block]))
+
+        self.steady = pd.Series(steady, index=chunk.index)
+        self.intervals.extend(closed)
+
+        return closed
+
+    def flush(self):
+        """Close the steady-state interval open at the last sample.
+
+        Returns
+        -------
+        intervals : [SteadyStateInterval]
+            the closed interval if the last window was steady
+
+        """
+
+        closed = self._close()
+        self.intervals.extend(closed)
+
+        return closed
+
+    def _start(self, chunk):
+        """Select the channels and allocate the running sums."""
+
+        self.channels, std, slope = [], [], []
+        for key in chunk.keys():
+            criterion = self.criteria.get(key)
+            if criterion is None:
+                info = parse_label(key)
+                criterion = info and self.criteria.get(info.type)
+            if criterion is not None:
+                self.channels.append(key)
+                std.append(criterion.std)
+                slope.append(criterion.slope)
+        if not self.channels:
+            raise ValueError('no column has a steady-state criterion')
+
+        # Criteria left out are never exceeded.
+        self._std = np.array(std, dtype=float)
+        self._std[np.isnan(self._std)] = np.inf
+        self._slope = np.array(slope, dtype=float)
+        self._slope[np.isnan(self._slope)] = np.inf
+
+        # Running sums of the values, squares, values weighted by the
+        # sample number since the origin, and missing values.
+        self._sums = np.zeros((self.window, 4, len(self.channels)))
+        self._labels = np.empty(self.window, dtype=object)
+        self._offset = None
+        self._origin = 0
+
+    def _infer_period(self, index):
+        """Infer the sample period from the time stamps of two samples.
+
+        Windows are only evaluated once full, so the period is known
+        before the first slope is needed.
+
+        """
+
+        times = np.r_[self._times, index.asi8[:self.window]]
+        if len(times) > 1:
+            self.period = float(np.median(np.diff(times))) / 1e9
+        else:
+            self._times = times
+
+    def _window_stats(self, values):
+        """Return the window standard deviations and slopes of rows.
+
+        Windows that are not full yet or hold missing values are NaN.
+
+        """
+
+        rows, n = len(values), self.window
+        missing = np.isnan(values)
+        if self._offset is None:
+            # Values are summed relative to their first finite value to
+            # limit the cancellation in the variance.
+            first = np.argmax(~missing, axis=0)
+            self._offset = values[first, np.arange(values.shape[1])]
+            self._offset[np.isnan(self._offset)] = 0.
+
+        y = np.where(missing, 0., values - self._offset)
+        numbers = np.arange(self._count + 1, self._count + rows + 1)
+        weights = (numbers - self._origin).astype(float)
+
+        sums = np.cumsum(np.stack([y, y * y, y * weights[:, None],
+                                   missing.astype(float)], axis=1), axis=0)
+        sums += self._sums[self._count % n]
+
+        # Sums at the sample before each window, the oldest ring buffer
+        # entries for the first rows and the block itself after them.
+        lagged = np.empty_like(sums)
+        head = min(rows, n)
+        lagged[:head] = self._sums[numbers[:head] % n]
+        lagged[head:] = sums[:rows - head]
+
+        tail = slice(max(rows - n, 0), rows)
+        self._sums[numbers[tail] % n] = sums[tail]
+
+        window = sums - lagged
+        sy, syy, sky = window[:, 0], window[:, 1], window[:, 2]
+        first = (numbers - n + 1 - self._origin)[:, None]
+        var = (syy - sy * sy / n) / (n - 1)
+        std = np.sqrt(np.maximum(var, 0))
+        slope = (sky - (first + (n - 1) / 2.) * sy) * 12. / \
+            (n * (n * n - 1))
+        if self.period:
+            slope /= self.period
+
+        invalid = (window[:, 3] > 0.5) | (numbers < n)[:, None]
+        std[invalid] = np.nan
+        slope[invalid] = np.nan
+
+        return std, slope
+
+    def _rebase(self):
+        """Shift the running sums to start at the oldest buffered sample.
+
+        Without it the sums of a long stream keep growing and lose the
+        precision of the window sums computed as their differences.
+
+        """
+
+        n = self.window
+        origin = self._count - n + 1
+        base = self._sums[origin % n].copy()
+        shift = origin - self._origin
+        self._sums[:, 2] -= base[2] + shift * (self._sums[:, 0] - base[0])
+        self._sums[:, [0, 1, 3]] -= base[[0, 1, 3]]
+        self._origin = origin
+
+    def _find_intervals(self, steady, labels):
+        """Merge runs of steady windows into steady-state intervals.
+
+        Advances the sample count past the block and buffers its labels.
+
+        """
+
+        n, rows = self.window, len(steady)
+        first = self._count + 1
+        closed = []
+        if self._open is not None and not (rows and steady[0]):
+            closed.extend(self._close())
+
+        edges = np.diff(np.r_[0, steady.astype(np.int8), 0])
+        for start, stop in zip(np.flatnonzero(edges == 1),
+                               np.flatnonzero(edges == -1)):
+            if start == 0 and self._open is not None:
+                label, begin = self._open[:2]
+            else:
+                # The window of the first steady row may start before
+                # the block, in the labels buffered from earlier blocks.
+                begin = first + start - n + 1
+                label = labels[begin - first] if begin >= first else \
+                    self._labels[begin % n]
+            self._open = (label, begin, labels[stop - 1], first + stop - 1)
+            if stop < rows:
+                closed.extend(self._close())
+
+        numbers = np.arange(first, first + rows)
+        tail = slice(max(rows - n, 0), rows)
+        self._labels[numbers[tail] % n] = labels[tail]
+        self._count += rows
+        if self._count - self._origin >= REBASE_WINDOWS * n:
+            self._rebase()
+
+        return closed
+
+    def _close(self):
+        """Return the open steady-state interval, closing it."""
+
+        if self._open is None:
+            return []
+
+        start, begin, stop, end = self._open
+        self._open = None
+
+        return [SteadyStateInterval(start, stop, end - begin + 1)]
+
+
+def find_steady_states(data, window, criteria, period=None):
+    """Find the steady-state intervals of measurement data.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        measurement data, usually returned by read_
+    window : int
+        number of samples in the moving window
+    criteria : {Criterion}
+        steady-state criteria keyed by column label or label type
+    period : float, optional
+        seconds between samples, see SteadyStateDetector
+
+    Returns
+    -------
+    intervals : [SteadyStateInterval]
+
+    """
+
+    detector = SteadyStateDetector(window, criteria, period)
+    detector.update(data)
+    detector.flush()
+
+    return detector.intervals
+
+
+def find_cycles(data, trigger, threshold=None, edge='rising', period=None):
+    """Segment measurement data into cycles at edges of a trigger channel.
+
+    A cycle spans from one edge of the trigger, i.e. the trigger values
+    crossing the threshold, to the sample before the next edge in the
+    same direction.  Samples before the first and after the last edge
+    belong to incomplete cycles and are left out.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        measurement data, usually returned by read_
+    trigger : string
+        label of the column starting the cycles, e.g. a compressor
+        power or a switch state column
+    threshold : float, optional
+        trigger value separating the on and off states, halfway between
+        the lowest and highest trigger values if None
+    edge : {'rising', 'falling'}, optional
+        start cycles when the trigger turns on or off
+    period : float, optional
+        seconds between samples, used if the data has no DatetimeIndex
+
+    Returns
+    -------
+    cycles : pandas DataFrame
+        one row per complete cycle with its start and stop labels, the
+        position of its first sample, the number of samples and the
+        duration in seconds, from its start to the start of the next
+        cycle
+
+    Examples
+    --------
+    >>> data = pd.DataFrame({'comp_elec_pwr': [0, 5, 5, 0, 0, 5, 5, 0,
+    ...                                        5, 0]})
+    >>> find_cycles(data, 'comp_elec_pwr')
+       start  stop  position  samples  duration
+    0      1     4         1        4       4.0
+    1      5     7         5        3       3.0
+
+    """
+
+    if edge not in ('rising', 'falling'):
+        msg = "edge must be 'rising' or 'falling', not {0!r}"
+        raise ValueError(msg.format(edge))
+
+    values = np.asarray(data[trigger], dtype=float)
+    if threshold is None:
+        threshold = (np.nanmin(values) + np.nanmax(values)) / 2.
+    state = (values > threshold).astype(np.int8)
+    step = 1 if edge == 'rising' else -1
+    starts = np.flatnonzero(np.diff(state) == step) + 1
+
+    times = _seconds(data.index, period)
+    positions = starts[:-1]
+    cycles = pd.DataFrame({
+        'start': data.index[positions],
+        'stop': data.index[starts[1:] - 1],
+        'position': positions,
+        'samples': np.diff(starts),
+        'duration': np.diff(times[starts]),
+    }, columns=['start', 'stop', 'position', 'samples', 'duration'])
+
+    return cycles
+
+
+def cycle_statistics(data, cycles, period=None):
+    """Average and integrate measurement data over each cycle.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        measurement data the cycles were found in
+    cycles : pandas DataFrame
+        cycles returned by find_cycles
+    period : float, optional
+        seconds between samples, used if the data has no DatetimeIndex
+
+    Returns
+    -------
+    mean : pandas DataFrame
+        mean of each numeric column over each cycle, skipping missing
+        values, with the column units of the data
+    integral : pandas DataFrame
+        trapezoidal time integral of each numeric column over each
+        cycle, from its start to the start of the next cycle, in the
+        column unit times seconds
+
+    Examples
+    --------
+    >>> data = pd.DataFrame({'comp_elec_pwr': [0, 5, 5, 0, 0, 5, 5, 0,
+    ...                                        5, 0]})
+    >>> mean, integral = cycle_statistics(
+    ...     data, find_cycles(data, 'comp_elec_pwr'))
+    >>> mean['comp_elec_pwr'].tolist(), integral['comp_elec_pwr'].tolist()
+    ([2.5, 3.3333333333333335], [10.0, 10.0])
+
+    """
+
+    keys = [key for key in data.keys()
+            if np.issubdtype(data[key].dtype, np.number)]
+    if not len(cycles):
+        empty = pd.DataFrame(columns=keys, dtype=float)
+        return empty, empty.copy()
+
+    positions = np.asarray(cycles['position'])
+    end = positions[-1] + np.asarray(cycles['samples'])[-1]
+    values = np.array(data[keys].values[:end + 1], dtype=float)
+
+    # Grouped sums over the samples of each cycle
+    finite = ~np.isnan(values[:end])
+    sums = np.add.reduceat(np.where(finite, values[:end], 0.), positions,
+                           axis=0)
+    counts = np.add.reduceat(finite, positions, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / counts
+
+    # Trapezoids between consecutive samples, up to the next cycle start
+    steps = np.diff(_seconds(data.index, period)[:end + 1])
+    areas = (values[:-1] + values[1:]) / 2. * steps[:, None]
+    integral = np.add.reduceat(areas, positions, axis=0)
+
+    mean = pd.DataFrame(mean, index=cycles.index, columns=keys)
+    integral = pd.DataFrame(integral, index=cycles.index, columns=keys)
+    units = getattr(data, 'units', {})
+    for key in keys:
+        if key in units:
+            mean[key].unit = units[key]
+    mean.units = {key: units[key] for key in keys if key in units}
+
+    return mean, integral
+
+
+def find_cyclic_steady_states(data, trigger, criteria, count=3,
+                              threshold=None, edge='rising', period=None):
+    """Find the runs of repeatable cycles of cycling measurement data.
+
+    Consecutive cycles are repeatable if the standard deviation and the
+    slope of their cycle means are within the criterion of each
+    channel, as checked by SteadyStateDetector over a window of count
+    cycles.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        measurement data, usually returned by read_
+    trigger : string
+        label of the column starting the cycles, see find_cycles
+    criteria : {Criterion}
+        limits on the standard deviation and slope per cycle of the
+        cycle means, keyed by column label or label type, the key
+        'duration' limits the cycle durations in seconds
+    count : int, optional
+        number of consecutive cycles compared
+    threshold, edge, period : optional
+        cycle segmentation parameters, see find_cycles
+
+    Returns
+    -------
+    intervals : [SteadyStateInterval]
+        runs of repeatable cycles, from the start of the first to the
+        stop of the last cycle
+
+    """
+
+    cycles = find_cycles(data, trigger, threshold, edge, period)
+    if len(cycles) < count:
+        return []
+
+    mean, _ = cycle_statistics(data, cycles, period)
+    mean['duration'] = cycles['duration']
+    detector = SteadyStateDetector(count, criteria, period=1.)
+    detector.update(mean)
+    detector.flush()
+
+    samples = np.asarray(cycles['samples'])
+    return [
+        SteadyStateInterval(cycles['start'][first], cycles['stop'][last],
+                            int(samples[first:last + 1].sum()))
+        for first, last, _ in detector.intervals
+    ]
+
+
+def _seconds(index, period=None):
+    """Return the sample times in seconds from the first sample."""
+
+    if isinstance(index, pd.DatetimeIndex):
+        return (index.asi8 - index.asi8[0]) / 1e9 if len(index) else \
+            np.empty(0)
+
+    return np.arange(len(index)) * float(period or 1.)
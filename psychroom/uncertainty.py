@@ -0,0 +1,340 @@
+"""Measurement uncertainty declaration and propagation."""
+from collections import namedtuple
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from averaging import Window, window_statistics
+from label_handler import parse_label
+from unit import IncompatibleUnitsError, Unit, convert
+
+
+Uncertainty = namedtuple('Uncertainty', ['absolute', 'relative'])
+
+# Header and sidecar section declaring the instrument uncertainties
+UNCERTAINTY_SECTION = 'uncertainty'
+# Unit strings declaring an uncertainty relative to the reading
+RELATIVE_UNITS = {'%': 0.01}
+
+
+def declared_uncertainties(data, declarations):
+    """Resolve uncertainty declarations for the columns of a data frame.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        measurement data with per-column units, usually read by read_
+    declarations : {MetadataInfo}
+        standard uncertainties keyed by column label or label type, e.g.
+        'T' for all temperatures, as parsed from an [uncertainty]
+        header section, a value in percent is relative to the reading,
+        a column label takes precedence over its type
+
+    Returns
+    -------
+    uncertainties : {Uncertainty}
+        absolute uncertainty in the column unit and relative uncertainty
+        of each declared column, declarations that are not numeric or
+        whose unit cannot be converted to the column unit are skipped
+        with a warning
+
+    Examples
+    --------
+    >>> from io_ import MetadataInfo
+    >>> from unit import get_unit
+    >>> data = pd.DataFrame({'comp_ref_in_T': [20.], 'comp_ref_in_pa': [1.]})
+    >>> data.units = {'comp_ref_in_T': get_unit('degC'),
+    ...               'comp_ref_in_pa': get_unit('kPa')}
+    >>> declared_uncertainties(data, {
+    ...     'T': MetadataInfo(0.2, get_unit('K')),
+    ...     'comp_ref_in_pa': MetadataInfo(0.5, '%')})
+    ... # doctest: +NORMALIZE_WHITESPACE
+    {'comp_ref_in_T': Uncertainty(absolute=0.2, relative=0.0),
+     'comp_ref_in_pa': Uncertainty(absolute=0.0, relative=0.005)}
+
+    """
+
+    units = getattr(data, 'units', {})
+    uncertainties = {}
+    for key in data.keys():
+        info = declarations.get(key)
+        if info is None:
+            label = parse_label(key)
+            info = label and declarations.get(label.type)
+        if info is None:
+            continue
+
+        try:
+            uncertainties[key] = _declared_uncertainty(info, units.get(key))
+        except (TypeError, ValueError, IncompatibleUnitsError) as err:
+            msg = 'skipped the uncertainty of {0!r}: {1}'
+            warnings.warn(msg.format(key, getattr(err, 'message', err)),
+                          RuntimeWarning)
+
+    return uncertainties
+
+
+def _declared_uncertainty(info, unit):
+    """Return the Uncertainty of a declaration for a column unit."""
+
+    value = float(info.value)
+    if info.unit in RELATIVE_UNITS:
+        return Uncertainty(0., value * RELATIVE_UNITS[info.unit])
+
+    if isinstance(info.unit, Unit) and isinstance(unit, Unit) and \
+            info.unit.quantity:
+        # Uncertainties are differences, only the scale applies.
+        scale = convert(info.unit, unit).scale
+        if scale is None:
+            msg = 'cannot convert from {0} to {1}'
+            raise ValueError(msg.format(info.unit.symbol, unit.symbol))
+        value *= scale
+
+    return Uncertainty(value, 0.)
+
+    return uncertainties
+
+
+def append_uncertainty(data, declarations):
+    """Append uncertainty properties to the measurement data columns.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        measurement data with per-column units
+    declarations : {MetadataInfo}
+        uncertainty declarations, see declared_uncertainties
+
+    Returns
+    -------
+    result : pandas DataFrame
+        measurement data with an uncertainty property on each declared
+        column and an uncertainties dictionary property
+
+    """
+
+    data.uncertainties = declared_uncertainties(data, declarations)
+    if isinstance(data, pd.DataFrame):
+        for key, uncertainty in data.uncertainties.items():
+            data[key].uncertainty = uncertainty
+
+    return data
+
+
+def standard_uncertainty(column, uncertainty=None):
+    """Return the standard uncertainty of every sample of a column.
+
+    Parameters
+    ----------
+    column : pandas Series or ndarray
+        measured values
+    uncertainty : Uncertainty, optional
+        uncertainty of the values, the uncertainty property of the
+        column by default, and none if it has none
+
+    Returns
+    -------
+    result : ndarray
+        absolute and relative uncertainty combined in quadrature
+
+    Examples
+    --------
+    >>> standard_uncertainty(np.array([10., -20.]), Uncertainty(0.3, 0.04))
+    array([0.5       , 0.85440037])
+
+    """
+
+    values = np.asarray(column, dtype=float)
+    if uncertainty is None:
+        uncertainty = getattr(column, 'uncertainty', Uncertainty(0., 0.))
+    absolute, relative = uncertainty
+
+    return np.hypot(absolute, relative * values)
+
+
+def propagate(func, inputs, uncertainties=None, method='linear', draws=1000,
+              seed=None):
+    """Propagate input uncertainties through a function of columns.
+
+    The function is evaluated on whole columns, so it should be written
+    with NumPy operations, and the inputs are treated as independent.
+
+    Parameters
+    ----------
+    func : callable
+        function of the input columns returning the derived quantity
+    inputs : [pandas Series or ndarray]
+        input columns, all of the same length
+    uncertainties : [ndarray or Uncertainty], optional
+        standard uncertainty of each input, per sample or as declared,
+        the uncertainty properties of the inputs by default
+    method : {'linear', 'montecarlo'}, optional
+        first order propagation with a Jacobian estimated by central
+        differences, or Monte Carlo sampling of normally distributed
+        input errors
+    draws : int, optional
+        number of Monte Carlo draws
+    seed : int, optional
+        seed of the Monte Carlo random number generator
+
+    Returns
+    -------
+    value : ndarray
+        derived quantity, the Monte Carlo mean with that method
+    uncertainty : ndarray
+        standard uncertainty of the derived quantity
+
+    Examples
+    --------
+    >>> x = np.array([1., 2.])
+    >>> y = np.array([3., 4.])
+    >>> value, u = propagate(lambda x, y: x * y, [x, y],
+    ...                      [Uncertainty(0.1, 0.), Uncertainty(0.2, 0.)])
+    >>> np.round(u, 6)
+    array([0.360555, 0.565685])
+
+    """
+
+    values = [np.asarray(column, dtype=float) for column in inputs]
+    if uncertainties is None:
+        uncertainties = [None] * len(inputs)
+    sigmas = [
+        standard_uncertainty(column, uncertainty)
+        if uncertainty is None or isinstance(uncertainty, Uncertainty)
+        else np.broadcast_to(np.asarray(uncertainty, dtype=float),
+                             np.shape(column))
+        for column, uncertainty in zip(inputs, uncertainties)
+    ]
+
+    if method == 'linear':
+        return _propagate_linear(func, values, sigmas)
+    elif method == 'montecarlo':
+        return _propagate_montecarlo(func, values, sigmas, draws, seed)
+
+    msg = "method must be 'linear' or 'montecarlo', not {0!r}"
+    raise ValueError(msg.format(method))
+
+
+def _propagate_linear(func, values, sigmas):
+    """First order propagation with central difference derivatives."""
+
+    result = np.asarray(func(*values), dtype=float)
+    variance = np.zeros(np.shape(result))
+    for ind, sigma in enumerate(sigmas):
+        # Steps of a fraction of the uncertainty keep the difference
+        # within the range the linearization is meant to hold over.
+        step = np.where(sigma > 0, sigma * 1e-3, 0.)
+        if not step.any():
+            continue
+        upper, lower = list(values), list(values)
+        upper[ind] = values[ind] + step
+        lower[ind] = values[ind] - step
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slope = (np.asarray(func(*upper)) - np.asarray(func(*lower))) / \
+                (2 * step)
+        variance += np.where(step > 0, slope * sigma, 0.) ** 2
+
+    return result, np.sqrt(variance)
+
+
+def _propagate_montecarlo(func, values, sigmas, draws, seed):
+    """Monte Carlo propagation with running moments over the draws.
+
+    The mean and variance are accumulated draw by draw with Welford's
+    algorithm, so memory stays at a few columns whatever the number of
+    draws.
+
+    """
+
+    random = np.random.RandomState(seed)
+    mean = m2 = None
+    for count in range(1, draws + 1):
+        sample = [value + sigma * random.standard_normal(np.shape(value))
+                  for value, sigma in zip(values, sigmas)]
+        result = np.asarray(func(*sample), dtype=float)
+        if mean is None:
+            mean, m2 = np.zeros(np.shape(result)), np.zeros(np.shape(result))
+        delta = result - mean
+        mean += delta / count
+        m2 += delta * (result - mean)
+
+    return mean, np.sqrt(m2 / max(draws - 1, 1))
+
+
+def mean_uncertainty(data, windows=None):
+    """Return the uncertainty of the window means of measurement data.
+
+    The instrument uncertainty does not average out and is combined in
+    quadrature with the random uncertainty of the mean, the standard
+    deviation of the samples over the square root of their number.
+
+    Parameters
+    ----------
+    data : pandas DataFrame
+        measurement data with uncertainty properties, usually read by
+        read_
+    windows : window spec or [window spec], optional
+        windows to average over, see averaging.window_statistics, the
+        whole data if None
+
+    Returns
+    -------
+    uncertainty : pandas DataFrame
+        uncertainty of the mean of each numeric column over each window,
+        columns without a declared uncertainty only get the random part
+
+    """
+
+    if windows is None:
+        windows = Window(None, None)
+    stats = window_statistics(data, windows)
+
+    declared = getattr(data, 'uncertainties', {})
+    sigmas = pd.DataFrame(
+        {key: standard_uncertainty(data[key], declared.get(key))
+         for key in stats.mean.keys()},
+        index=data.index, columns=stats.mean.keys()
+    )
+    instrument = window_statistics(sigmas, windows).mean
+    with np.errstate(invalid='ignore', divide='ignore'):
+        random = stats.std / np.sqrt(stats.count)
+    random = random.where(stats.count > 1, 0.)
+
+    return np.hypot(instrument, random)
+
+
+def uncertainty_report(data, windows=None):
+    """Report the uncertainty of the means of a collection of test data.
+
+    Parameters
+    ----------
+    data : {pandas DataFrame}
+        dictionary of test data frames, usually returned by load_
+    windows : window spec, [window spec] or dict, optional
+        windows to average each test over, see io_.summarize
+
+    Returns
+    -------
+    report : pandas DataFrame
+        uncertainty of the means, with one row per summary row of
+        io_.summarize with the same windows
+
+    """
+
+    rows, frames = [], []
+    for id_ in sorted(data):
+        spec = windows.get(id_, []) if isinstance(windows, dict) else \
+            windows
+        frame = mean_uncertainty(data[id_], spec)
+        rows.extend([id_] if windows is None else
+                    [(id_, pos) for pos in range(len(frame))])
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame()
+    report = pd.concat(frames)
+    report.index = rows if windows is None else \
+        pd.MultiIndex.from_tuples(rows, names=['test', 'window'])
+
+    return report
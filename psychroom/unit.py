@@ -1,10 +1,64 @@
 """Unit base class, subclasses and associated methods."""
 
 # from collections import OrderedDict
+from collections import namedtuple
 
+import numpy as np
+import pandas as pd
+
+from compat import mappingproxy
 from prefix_library import prefix_library
 from unit_library import unit_library
-from util import DEG_SYMBOL
+from util import DEG_SYMBOL, LRUCache
+
+
+UnitRegistry = namedtuple('UnitRegistry', [
+    'prefixes', 'prefix_symbols', 'prefix_magnitudes', 'units',
+    'unit_symbols', 'prefix_suffixes', 'unit_suffixes'
+])
+
+_REGISTRY = None
+
+UNIT_CACHE_SIZE = 256
+_UNIT_CACHE = LRUCache(UNIT_CACHE_SIZE)
+
+CONVERSION_CACHE_SIZE = 1024
+_CONVERSION_CACHE = LRUCache(CONVERSION_CACHE_SIZE)
+
+# Target unit strings of each unit system keyed by unit quantity.
+UNIT_SYSTEMS = {
+    'SI': {
+        'temperature': 'K',
+        'pressure': 'Pa',
+        'dimensionless': '-',
+        'length': 'm',
+        'mass': 'kg',
+        'time': 's',
+        'electric current': 'A',
+        'electric potential': 'V',
+    },
+    'IP': {
+        'temperature': 'degF',
+        'pressure': 'psi',
+        'dimensionless': '-',
+        'length': 'ft',
+        'mass': 'lbm',
+        'time': 's',
+        'electric current': 'A',
+        'electric potential': 'V',
+    },
+    # Units of the psychrometric and fluid property formulas
+    'metric': {
+        'temperature': 'degC',
+        'pressure': 'kPa',
+        'dimensionless': '-',
+        'length': 'm',
+        'mass': 'kg',
+        'time': 's',
+        'electric current': 'A',
+        'electric potential': 'V',
+    },
+}
 
 
 class IncompatibleUnitsError(Exception):
@@ -24,6 +78,86 @@ class IncompatibleUnitsError(Exception):
         self.message = message
 
 
+class UnitConversion(object):
+
+    """Callable that converts values from one unit to another.
+
+    Conversions between affine units are reduced to a single scale and
+    offset, which is applied to NumPy arrays and pandas Series with one
+    multiply-add over the whole buffer.  Conversions that are not
+    affine fall back to composing the unit to_base and from_base
+    functions.
+
+    Parameters
+    ----------
+    to_base : func
+        function that converts a value in the old unit to the base unit
+    from_base : func
+        function that converts a value in the base unit to the new unit
+
+    Attributes
+    ----------
+    scale : float or None
+        conversion slope, None if the conversion is not affine
+    offset : float or None
+        conversion intercept, None if the conversion is not affine
+
+    """
+
+    def __init__(self, to_base, from_base):
+        self._to_base = to_base
+        self._from_base = from_base
+        affine = _affine(lambda x: from_base(to_base(x)))
+        self.scale, self.offset = affine if affine else (None, None)
+
+    def __call__(self, x, inplace=False):
+        """Convert a value in the old unit to a value in the new unit.
+
+        Parameters
+        ----------
+        x : float, array_like or pandas Series
+            value or values in the old unit
+        inplace : bool, optional
+            overwrite the buffer of a floating point ndarray or Series
+            instead of allocating a new one, other inputs, including
+            data frames, are copied
+
+        Returns
+        -------
+        result : float, ndarray or pandas Series
+            value or values in the new unit
+
+        """
+
+        if self.scale is None:
+            return self._from_base(self._to_base(x))
+
+        if isinstance(x, (list, tuple)):
+            x = np.asarray(x)
+        values = getattr(x, 'values', x)
+        if not isinstance(values, np.ndarray):
+            return self.scale * x + self.offset
+
+        # Data frame values may be a consolidated copy, so never write
+        # into them.
+        writable = values.dtype.kind == 'f' and values.flags.writeable
+        if inplace and writable and not hasattr(x, 'columns'):
+            out = values
+        else:
+            out = np.array(values, dtype=np.result_type(values, float))
+        np.multiply(out, self.scale, out=out)
+        np.add(out, self.offset, out=out)
+
+        if out is values:
+            return x
+        elif values is x:
+            return out
+        elif hasattr(x, 'columns'):
+            return type(x)(out, index=x.index, columns=x.columns)
+        else:
+            return type(x)(out, index=x.index, name=x.name)
+
+
 class UnitPrefix(object):
 
     "Measurement unit prefix base class."""
@@ -34,6 +168,11 @@ class UnitPrefix(object):
         self._magnitude = None
         self._name = None
 
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise AttributeError('shared UnitPrefix instances are immutable')
+        object.__setattr__(self, name, value)
+
     def _lookup(self, val):
         """Look-up prefix properties for a given prefix value.
 
@@ -46,35 +185,30 @@ class UnitPrefix(object):
 
         """
 
-        p_lib = self._library()
-
-        if val in p_lib:
-            self.name = val
-            self.symbol = p_lib[val].symbol
-            self.magnitude = p_lib[val].magnitude
-        elif isinstance(val, int) or isinstance(val, float):
-            for key, info in p_lib.items():
-                if info.magnitude == val:
-                    self.name = key
-                    self.symbol = info.symbol
-                    self.magnitude = info.magnitude
-                    break
-        elif isinstance(val, str) and len(val) == 1:
-            for key, info in p_lib.items():
-                if info.symbol == val:
-                    self.name = key
-                    self.symbol = info.symbol
-                    self.magnitude = info.magnitude
-                    break
+        registry = get_registry()
+
+        is_number = isinstance(val, (int, float))
+        is_str = isinstance(val, str)
+
+        if val in registry.prefixes:
+            name = val
+        elif is_number and val in registry.prefix_magnitudes:
+            name = registry.prefix_magnitudes[val]
+        elif is_str and val in registry.prefix_symbols:
+            name = registry.prefix_symbols[val]
+        elif is_number or (is_str and len(val) == 1):
+            return
         else:
             raise Exception('Unrecognized prefix argument.')
 
+        self.name = name
+        self.symbol = registry.prefixes[name].symbol
+        self.magnitude = registry.prefixes[name].magnitude
+
     def _library(self):
         """Prefix library containing prefix property mappings."""
 
-        lib, _ = load_libraries()
-
-        return lib
+        return get_registry().prefixes
 
     @property
     def symbol(self):
@@ -110,8 +244,24 @@ class Unit(object):
 
     Parameters
     ----------
-    new : str, optional
-        unit string name or symbol
+    new : str or (str, str), optional
+        unit string name or symbol, or the (prefix name, unit key) pair
+        of the parts property
+
+    Examples
+    --------
+    Prefixed symbols can read as another unit, the parts cannot:
+
+    >>> Unit('milliinch').symbol
+    'min'
+    >>> Unit(Unit('milliinch').parts).name
+    'milliinch'
+
+    and pickled units are rebuilt from their parts:
+
+    >>> import pickle
+    >>> pickle.loads(pickle.dumps(get_unit('milliinch'))).name
+    'milliinch'
 
     """
 
@@ -123,10 +273,18 @@ class Unit(object):
         self._prefix = UnitPrefix()
         self._to_base = None
         self._from_base = None
-
-        if new:
+        self._key = None
+
+        if isinstance(new, tuple):
+            p_name, key = new
+            if p_name:
+                self.prefix._lookup(p_name)
+            if key is not None:
+                self._assign(key)
+        elif new:
             p_str, u_str = parse_unit_string(new)
-            self.prefix._lookup(p_str)
+            if p_str != 'none':  # leave the prefix unset without one
+                self.prefix._lookup(p_str)
             self._lookup(u_str)
 
     def __format__(self, spec=None):
@@ -135,6 +293,18 @@ class Unit(object):
         else:
             pass
 
+    def __reduce__(self):
+        # The conversion functions are lambdas and cannot be pickled,
+        # so rebuild the unit from its parts instead, as prefixed
+        # symbols such as 'min' for milliinch can read as other units.
+        factory = get_unit if self.__dict__.get('_frozen') else type(self)
+        return factory, (self.parts,) if any(self.parts) else ()
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise AttributeError('shared Unit instances are immutable')
+        object.__setattr__(self, name, value)
+
     def __repr__(self):
         return str(self)
 
@@ -157,31 +327,33 @@ class Unit(object):
         else:
             raise Exception('Argument val not a string.')
 
-        u_lib = self._library()
-        if val in u_lib:
-            self.quantity = u_lib[val].quantity
-            self.name = u_lib[val].name
-            self.symbol = u_lib[val].symbol
-            self.base = u_lib[val].base
-            self.to_base = u_lib[val].to_base
-            self.from_base = u_lib[val].from_base
-        else:
-            for key, info in u_lib.items():
-                if info.symbol == val:
-                    self.quantity = info.quantity
-                    self.name = info.name
-                    self.symbol = info.symbol
-                    self.base = info.base
-                    self.to_base = info.to_base
-                    self.from_base = info.from_base
-                    break
+        registry = get_registry()
+        key = val if val in registry.units else registry.unit_symbols.get(val)
+        if key is not None:
+            self._assign(key)
+
+    def _assign(self, key):
+        """Set the unit properties of a unit library key."""
+
+        info = get_registry().units[key]
+        self._key = key
+        self.quantity = info.quantity
+        self.name = info.name
+        self.symbol = info.symbol
+        self.base = info.base
+        self.to_base = info.to_base
+        self.from_base = info.from_base
 
     def _library(self):
         """Unit library containing unit property mappings."""
 
-        _, lib = load_libraries()
+        return get_registry().units
+
+    def _freeze(self):
+        """Make the unit and its prefix immutable so it can be shared."""
 
-        return lib
+        object.__setattr__(self.prefix, '_frozen', True)
+        object.__setattr__(self, '_frozen', True)
 
     def to(self, new):
         """Return function that convert unit to a new unit.
@@ -193,7 +365,7 @@ class Unit(object):
 
         Returns
         -------
-        result : func
+        result : UnitConversion
             function that converts a value in the current unit to
             a value in the new unit
 
@@ -209,6 +381,16 @@ class Unit(object):
 
         return convert(self, new)
 
+    @property
+    def parts(self):
+        """The (prefix name, unit library key) pair of the unit.
+
+        Unlike the symbol, the parts identify the unit unambiguously,
+        so they are what units are stored and pickled as.
+
+        """
+        return self.prefix.name, self._key
+
     @property
     def name(self):
         """The unit name property, i.e. degree Celsius, kilopascal."""
@@ -291,17 +473,107 @@ class Unit(object):
             self._from_base = func
 
 
+def get_unit(new=None):
+    """Return a shared, immutable unit for a unit string.
+
+    Units are cached by their string, so repeated strings such as the
+    column units of a test data file share one parsed Unit instance.
+    The least recently used units are evicted once UNIT_CACHE_SIZE
+    different strings have been requested.
+
+    Parameters
+    ----------
+    new : str or (str, str), optional
+        unit string name or symbol, or the (prefix name, unit key) pair
+        of Unit.parts
+
+    Returns
+    -------
+    unit : Unit
+        immutable unit instance, modifying it raises AttributeError
+
+    Examples
+    --------
+    >>> get_unit('kPa') is get_unit('kPa')
+    True
+
+    >>> get_unit('degC').symbol == Unit('degC').symbol
+    True
+
+    """
+
+    unit = _UNIT_CACHE.get(new)
+    if unit is None:
+        unit = Unit(new)
+        unit._freeze()
+        _UNIT_CACHE[new] = unit
+
+    return unit
+
+
 def load_libraries():
     """Load the units and prefixes libraries.
 
     Returns
     -------
-    unit_library : dict
     prefix_library : dict
+    unit_library : dict
 
     """
 
-    return prefix_library(), unit_library()
+    registry = get_registry()
+
+    return registry.prefixes, registry.units
+
+
+def get_registry():
+    """Return the process-wide unit registry, building it on first use.
+
+    Returns
+    -------
+    registry : UnitRegistry
+        read-only prefix and unit libraries along with the symbol and
+        magnitude indexes used by the unit look-ups and the suffix
+        tries used to parse unit strings
+
+    """
+
+    global _REGISTRY
+
+    if _REGISTRY is None:
+        _REGISTRY = _build_registry()
+
+    return _REGISTRY
+
+
+def _build_registry():
+    """Build the unit registry from the unit and prefix libraries."""
+
+    p_lib, u_lib = prefix_library(), unit_library()
+    p_words = [key for key in p_lib if isinstance(key, str)]
+    u_words = list(u_lib)
+
+    # The first entry wins when several share a symbol or magnitude,
+    # matching the order the library scans used to resolve them in.
+    prefix_symbols, prefix_magnitudes, unit_symbols = {}, {}, {}
+    for key, info in p_lib.items():
+        if info.symbol:
+            prefix_symbols.setdefault(info.symbol, key)
+        prefix_magnitudes.setdefault(info.magnitude, key)
+    for key, info in u_lib.items():
+        unit_symbols.setdefault(info.symbol, key)
+    p_words.extend(info.symbol for info in p_lib.values())
+    u_words.extend(info.symbol for info in u_lib.values())
+
+    return UnitRegistry(
+        prefixes=mappingproxy(p_lib),
+        prefix_symbols=mappingproxy(prefix_symbols),
+        prefix_magnitudes=mappingproxy(prefix_magnitudes),
+        units=mappingproxy(u_lib),
+        unit_symbols=mappingproxy(unit_symbols),
+        prefix_suffixes=_suffix_trie(p_words),
+        unit_suffixes=_suffix_trie(u_words),
+    )
 
 
 def parse_unit_string(raw):
@@ -323,35 +595,76 @@ def parse_unit_string(raw):
 
     """
 
-    p_lib, u_lib = load_libraries()
+    registry = get_registry()
 
     raw = raw.replace('deg', DEG_SYMBOL, 1)
-    try:
-        u_str = [k for k in u_lib if raw.endswith(str(k))] or \
-            [i.symbol for k, i in u_lib.items() if raw.endswith(str(i.symbol))]
-    except UnicodeEncodeError:
-        u_str = [k for k in u_lib if raw.endswith(k)] or \
-            [i.symbol for k, i in u_lib.items() if raw.endswith(i.symbol)]
-        import pdb; pdb.set_trace()
+    u_str = _longest_suffix(registry.unit_suffixes, raw)
     if not u_str:
         raise Exception('Unrecognized unit string {}'.format(raw))
 
-    u_str = u_str.pop()
-    raw = raw[:raw.rfind(u_str)]  # chop off unit part of raw string
+    raw = raw[:-len(u_str)]  # chop off unit part of raw string
 
     if not raw:
         p_str = 'none'
     else:
-        p_str = [k for k in p_lib if raw.endswith(str(k))] or \
-            [i.symbol for k, i in p_lib.items() if raw.endswith(str(i.symbol))]
+        p_str = _longest_suffix(registry.prefix_suffixes, raw)
     if not p_str:
         raise Exception('Unrecognized prefix string {}'.format(raw))
 
-    p_str = sorted(p_str)[-1]
-
     return p_str, u_str
 
 
+def _suffix_trie(words):
+    """Build a trie of the reversed words for longest-suffix matching.
+
+    Parameters
+    ----------
+    words : iterable of str
+        words to index, empty strings are ignored
+
+    Returns
+    -------
+    trie : dict
+        nested dictionaries keyed by character from the end of the
+        words, the word ending at a node is stored under the None key
+
+    """
+
+    trie = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for char in reversed(word):
+            node = node.setdefault(char, {})
+        node[None] = word
+
+    return trie
+
+
+def _longest_suffix(trie, raw):
+    """Return the longest word in a suffix trie that ends raw.
+
+    Examples
+    --------
+    >>> _longest_suffix(_suffix_trie(['in', 'min', 's']), 'kmin')
+    'min'
+
+    >>> _longest_suffix(_suffix_trie(['in', 'min']), 'Pa') is None
+    True
+
+    """
+
+    node, match = trie, None
+    for char in reversed(raw):
+        node = node.get(char)
+        if node is None:
+            break
+        match = node.get(None, match)
+
+    return match
+
+
 def convert(old, new):
     """Make a function that converts from one unit to another unit.
 
@@ -364,10 +677,21 @@ def convert(old, new):
 
     Returns
     -------
-    old_to_new : func
+    old_to_new : UnitConversion
         function that whose input is a value in the old units and
         returns a value in the new units
 
+    Raises
+    ------
+    IncompatibleUnitsError
+        if the units measure different quantities
+
+    Notes
+    -----
+    Conversions are cached by the pair of unit strings, or the quantity
+    and symbol of Unit arguments, so repeated calls, including ones
+    that raise IncompatibleUnitsError, skip parsing the units again.
+
     Examples
     --------
     >>> round(convert('degC', 'degF')(0))
@@ -381,29 +705,153 @@ def convert(old, new):
 
     """
 
-    # Use duck-typing and recursion get the arguments into the expected
-    # form.
-    try:
-        # TODO This part gets buggy, for some reason I can't get it to
-        # raise the exception when I want.
+    key = _conversion_key(old), _conversion_key(new)
+    plan = _CONVERSION_CACHE.get(key)
+    if plan is None:
+        old, new = _as_unit(old), _as_unit(new)
         if old.quantity == new.quantity:
-            to_base = old.to_base
-            from_base = new.from_base
+            plan = UnitConversion(old.to_base, new.from_base)
         else:
             msg = 'conversion between {0} and {1} not possible'
-            raise IncompatibleUnitsError(msg.format(old.symbol, new.symbol))
-    except AttributeError:
-        try:
-            return convert(Unit(old), Unit(new))
-        except:
-            try:
-                return convert(old, Unit(new))
-            except AttributeError:
-                return convert(Unit(old), new)
-            except IncompatibleUnitsError as err:
-                raise err
-
-    return lambda x: from_base(to_base(x))
+            plan = IncompatibleUnitsError(msg.format(old.symbol, new.symbol))
+        _CONVERSION_CACHE[key] = plan
+
+    if isinstance(plan, IncompatibleUnitsError):
+        raise IncompatibleUnitsError(plan.message)
+
+    return plan
+
+
+def _as_unit(value):
+    """Return value if it behaves like a Unit, else the parsed unit."""
+
+    return value if hasattr(value, 'quantity') else get_unit(value)
+
+
+def _conversion_key(value):
+    """Return the conversion plan cache key of a unit or unit string."""
+
+    if hasattr(value, 'quantity'):
+        return value.quantity, value.symbol
+
+    return value
+
+
+def normalize(values, quantity, system='metric'):
+    """Return values as an array in the unit of a unit system.
+
+    Parameters
+    ----------
+    values : array_like
+        values with an optional unit property, such as the columns
+        returned by read_, values without one are assumed to be in the
+        unit of the system already
+    quantity : str
+        quantity the values are expected to measure
+    system : str, optional
+        name of the unit system, a key of UNIT_SYSTEMS
+
+    Returns
+    -------
+    result : ndarray
+        float values in the unit of the system for the quantity
+
+    Raises
+    ------
+    ValueError
+        if the unit property of the values measures another quantity
+
+    Examples
+    --------
+    >>> temperature = pd.Series([273.15, 373.15])
+    >>> temperature.unit = get_unit('K')
+    >>> normalize(temperature, 'temperature')
+    array([  0., 100.])
+
+    """
+
+    unit = getattr(values, 'unit', None)
+    values = np.asarray(values, dtype=float)
+    target = UNIT_SYSTEMS[system].get(quantity)
+    if isinstance(unit, Unit) and unit.quantity == quantity and target:
+        values = convert(unit, target)(values)
+    elif isinstance(unit, Unit) and unit.quantity and \
+            unit.quantity != quantity:
+        msg = 'expected a {0}, got values in {1}'
+        raise ValueError(msg.format(quantity, unit.symbol))
+
+    return values
+
+
+def series_like(values, like, unit=None):
+    """Return values as a Series indexed like like if it is a Series.
+
+    Parameters
+    ----------
+    values : ndarray
+    like : array_like
+        input the values were computed from
+    unit : str, optional
+        unit string of the values, set as the unit property of the
+        Series
+
+    Returns
+    -------
+    result : ndarray or pandas Series
+        values unchanged if like is not a Series
+
+    """
+
+    if not isinstance(like, pd.Series):
+        return values
+
+    result = pd.Series(values, index=like.index)
+    if unit is not None:
+        result.unit = get_unit(unit)
+
+    return result
+
+
+def _affine(func, span=2. ** 20):
+    """Return the scale and offset of func if it is an affine function.
+
+    Parameters
+    ----------
+    func : func
+        scalar function to probe
+    span : float, optional
+        distance between the probe points used to estimate the scale
+
+    Returns
+    -------
+    coefficients : (float, float) or None
+        scale and offset such that func(x) == scale * x + offset, or
+        None if func does not behave like an affine function
+
+    Examples
+    --------
+    >>> _affine(lambda x: 1.8 * x + 32.)
+    (1.8, 32.0)
+
+    >>> _affine(lambda x: x ** 2) is None
+    True
+
+    """
+
+    try:
+        offset = float(func(0.))
+        scale = (float(func(span)) - offset) / span
+        # Snap away the round-off of the probe, i.e. 1.0000000000000002
+        snapped = float('{0:.12g}'.format(scale))
+        if abs(snapped - scale) <= 4 * np.finfo(float).eps * abs(scale):
+            scale = snapped
+        for x in (1., -span, 12345.678):
+            if not np.isclose(func(x), scale * x + offset, rtol=1e-9):
+                return None
+    except (ArithmeticError, TypeError, ValueError):
+        return None
+
+    return scale, offset
 
 
 def parse_unit_name(input_string):
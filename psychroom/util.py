@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 """Utility functions and variables used throughout code."""
+from collections import OrderedDict
+import threading
 
 from compat import PY3
 
@@ -10,3 +12,50 @@ if PY3:
 else:
     DEG_SYMBOL = 'deg'
     MICRO_SYMBOL = 'u'
+
+
+_MISSING = object()
+
+
+class LRUCache(object):
+
+    """Bounded mapping that discards the least recently used entries.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        maximum number of entries kept in the cache
+
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Return the cached value for key and mark it recently used."""
+        with self._lock:
+            value = self._data.pop(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._data[key] = value
+        return value
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._data.clear()